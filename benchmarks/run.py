@@ -0,0 +1,321 @@
+"""Benchmark suite for the typing simulator.
+
+Runs headless against the in-memory RecordingBackend and prints one JSON
+document, so results can be stored and compared across releases:
+
+    python -m benchmarks.run --output results.json
+    python -m benchmarks.run --quick --only planning jitter
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+from src.config import DEFAULT_CONFIG, SPEED_PRESETS
+from src.typing_engine import TypingSimulator
+from src.async_engine import AsyncTypingSimulator
+from src.backends import BACKENDS, RecordingBackend
+from src.keyboard_layout import get_adjacent_key, get_layout_index
+from src.trace import TraceRecorder
+from src.utils import generate_delay, generate_delays
+from src.plan_cache import get_plan_cache
+from src.dataset import generate_dataset
+
+# Measure the planner itself, not the plan cache
+UNCACHED = dict(DEFAULT_CONFIG, PLAN_CACHE=False)
+
+# Import time budgets in milliseconds, on top of a bare interpreter start.
+# src.gui must open its window without NumPy or an output library; the
+# engine modules are allowed NumPy but nothing display-dependent.
+STARTUP_BUDGET_MS = {
+    "src.config": 25,
+    "src.gui": 100,
+    "src.planner": 400,
+    "src.typing_engine": 400,
+}
+# Modules that must stay unloaded after importing the key module
+STARTUP_FORBIDDEN = {
+    "src.config": ["numpy"],
+    "src.gui": ["numpy", "src.typing_engine", "pyautogui"],
+    "src.planner": ["pyautogui", "Xlib", "tkinter", "asyncio"],
+    "src.typing_engine": ["pyautogui", "Xlib", "tkinter", "asyncio"],
+}
+
+SAMPLE_TEXT = (
+    "The quick brown fox jumps over the lazy dog. Pack my box with five dozen "
+    "liquor jugs, then count: 1, 2, 3!\nSphinx of black quartz, judge my vow? "
+)
+
+
+def _text(size):
+    """Repeat the sample text up to ``size`` characters."""
+    return (SAMPLE_TEXT * (size // len(SAMPLE_TEXT) + 1))[:size]
+
+
+def _per_call(func, calls):
+    """Average seconds per call of ``func()``."""
+    start = time.perf_counter()
+    for _ in range(calls):
+        func()
+    return (time.perf_counter() - start) / calls
+
+
+def bench_planning(quick):
+    """Planning throughput in characters per second."""
+    size = 200_000 if quick else 2_000_000
+    text = _text(size)
+    simulator = TypingSimulator(UNCACHED.copy())
+    simulator.reseed(0)
+    start = time.perf_counter()
+    events = sum(len(plan) for plan in simulator.iter_plans(text))
+    elapsed = time.perf_counter() - start
+    return {"chars": events, "seconds": elapsed, "chars_per_second": events / elapsed}
+
+
+def bench_primitives(quick):
+    """Cost of delay generation and adjacent-key sampling."""
+    calls = 20_000 if quick else 200_000
+    rng = np.random.default_rng(0)
+    cpm_mean, cpm_std = DEFAULT_CONFIG["WPM_MEAN"] * 5, DEFAULT_CONFIG["WPM_STD"] * 5
+    keys = np.array(list(_text(calls)))
+    layout = get_layout_index(DEFAULT_CONFIG["KEYBOARD_LAYOUT"])
+
+    start = time.perf_counter()
+    generate_delays(cpm_mean, cpm_std, DEFAULT_CONFIG["MIN_CPM"], calls, rng)
+    bulk_delay = (time.perf_counter() - start) / calls
+    start = time.perf_counter()
+    layout.sample(keys, rng)
+    bulk_adjacent = (time.perf_counter() - start) / calls
+    return {
+        "generate_delay_us": 1e6 * _per_call(
+            lambda: generate_delay(cpm_mean, cpm_std, DEFAULT_CONFIG["MIN_CPM"], rng),
+            calls // 10,
+        ),
+        "generate_delays_us_per_key": 1e6 * bulk_delay,
+        "get_adjacent_key_us": 1e6 * _per_call(lambda: get_adjacent_key("f", rng=rng), calls // 10),
+        "adjacent_sample_us_per_key": 1e6 * bulk_adjacent,
+    }
+
+
+def bench_jitter(quick):
+    """Scheduler timing error (realised minus planned gap) at each preset."""
+    events = 10 if quick else 100
+    results = {}
+    for preset, data in SPEED_PRESETS.items():
+        config = dict(DEFAULT_CONFIG, WPM_MEAN=data["wpm"], ENABLE_ERRORS=False)
+        trace = TraceRecorder(capacity=1 << 16)
+        simulator = TypingSimulator(config, backend=RecordingBackend(), trace=trace)
+        plan = simulator.plan(_text(events), seed=0)
+        plan["pause"] = 0  # Measure keystroke scheduling only
+        simulator.scheduler.start()
+        trace.mark(simulator.scheduler.deadline)
+        simulator._execute_plan(plan)
+        records = trace.records()
+        error = records["actual"] - records["planned"]
+        results[preset] = {
+            "wpm": data["wpm"],
+            "events": int(records.size),
+            "mean_abs_ms": float(np.abs(error).mean()),
+            "p50_ms": float(np.percentile(error, 50)),
+            "p99_ms": float(np.percentile(error, 99)),
+            "max_ms": float(np.abs(error).max()),
+        }
+    return results
+
+
+def bench_async(quick):
+    """Per-session timing error with many concurrent typists on one event loop."""
+    sessions = 200 if quick else 2000
+    config = dict(DEFAULT_CONFIG, WPM_MEAN=120, ENABLE_ERRORS=False)
+    text = _text(40)
+    simulators = []
+    for i in range(sessions):
+        trace = TraceRecorder(capacity=64)
+        simulators.append(AsyncTypingSimulator(config, backend=RecordingBackend(), trace=trace))
+
+    async def run():
+        await asyncio.gather(*(s.type_stream(text, i) for i, s in enumerate(simulators)))
+
+    start = time.perf_counter()
+    asyncio.run(run())
+    elapsed = time.perf_counter() - start
+    gaps = [s.trace.records()[1:] for s in simulators]  # First gap is from the anchor
+    error = np.concatenate([r["actual"] - r["planned"] for r in gaps])
+    return {
+        "sessions": sessions,
+        "events": int(error.size),
+        "seconds": elapsed,
+        "mean_abs_ms": float(np.abs(error).mean()),
+        "p50_ms": float(np.percentile(error, 50)),
+        "p99_ms": float(np.percentile(error, 99)),
+        "max_ms": float(np.abs(error).max()),
+    }
+
+
+def bench_backends(quick):
+    """Per-call write() cost of every backend that can be created here."""
+    calls = 2_000 if quick else 20_000
+    results = {}
+    for name, backend_class in BACKENDS.items():
+        try:
+            backend = backend_class()
+        except Exception as e:
+            results[name] = {"available": False, "reason": str(e)}
+            continue
+        if name != "recording":
+            # Real injectors would type into whatever window has focus
+            results[name] = {"available": True, "measured": False}
+            backend.close()
+            continue
+        results[name] = {
+            "available": True,
+            "measured": True,
+            "write_us": 1e6 * _per_call(lambda: backend.write("a"), calls),
+        }
+    return results
+
+
+def bench_plan_cache(quick):
+    """Time to plan a document cold, from the memory tier and from the disk tier."""
+    size = 200_000 if quick else 2_000_000
+    text = _text(size)
+    with tempfile.TemporaryDirectory() as directory:
+        # The disk tier is opt-in; give it room for every window of the text
+        config = dict(DEFAULT_CONFIG, PLAN_CACHE_DIR=directory, PLAN_CACHE_DISK_MB=1024)
+        simulator = TypingSimulator(config)
+        cache = get_plan_cache(config)
+        results = {"chars": size}
+        for tier in ("cold", "memory", "disk"):
+            if tier == "disk":
+                cache.flush()  # Wait for the background writer
+                cache.clear()
+            misses = cache.misses
+            start = time.perf_counter()
+            simulator.plan(text, seed=0)
+            results[f"{tier}_seconds"] = time.perf_counter() - start
+            if tier == "disk":
+                assert cache.misses == misses, "disk pass recompiled windows"
+        results["hits"], results["misses"] = cache.hits, cache.misses
+    return results
+
+
+def bench_memory(quick):
+    """Peak traced memory while planning a large input, streamed vs whole."""
+    size = 1_000_000 if quick else 10_000_000
+    simulator = TypingSimulator(UNCACHED.copy())
+
+    def chunks():
+        piece = _text(64 * 1024)
+        for _ in range(size // len(piece)):
+            yield piece
+
+    results = {"chars": size}
+    tracemalloc.start()
+    simulator.reseed(0)
+    for _ in simulator.iter_plans(chunks()):
+        pass
+    results["streamed_peak_mb"] = tracemalloc.get_traced_memory()[1] / 2**20
+    tracemalloc.reset_peak()
+    simulator.plan("".join(chunks()), seed=0)
+    results["whole_text_peak_mb"] = tracemalloc.get_traced_memory()[1] / 2**20
+    tracemalloc.stop()
+    return results
+
+
+def bench_dataset(quick):
+    """Dataset generation throughput with one worker and with one per core."""
+    documents = [_text(2000)] * (200 if quick else 2000)
+    cores = os.cpu_count() or 1
+    results = {"documents": len(documents), "cores": cores}
+    for workers in sorted({1, cores}):
+        with tempfile.TemporaryDirectory() as directory:
+            manifest = generate_dataset(documents, directory, UNCACHED, 0, workers, 32)
+        results[f"documents_per_second_{workers}"] = len(documents) / manifest["seconds"]
+    results["speedup"] = (
+        results[f"documents_per_second_{cores}"] / results["documents_per_second_1"]
+    )
+    return results
+
+
+def _import_seconds(statement, env):
+    """Best wall time of a fresh interpreter running ``statement``."""
+    best = float("inf")
+    for _ in range(5):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", statement], env=env, check=True)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_startup(quick):
+    """Cold import time per module against STARTUP_BUDGET_MS, with no display."""
+    env = {key: value for key, value in os.environ.items() if key != "DISPLAY"}
+    baseline = _import_seconds("pass", env)
+    results = {"baseline_ms": 1e3 * baseline}
+    for module, budget in STARTUP_BUDGET_MS.items():
+        probe = (
+            f"import sys, {module}; "
+            f"loaded = [m for m in {STARTUP_FORBIDDEN[module]!r} if m in sys.modules]; "
+            "sys.exit(f'loaded {loaded}' if loaded else 0)"
+        )
+        elapsed_ms = 1e3 * (_import_seconds(probe, env) - baseline)
+        results[module] = {
+            "ms": elapsed_ms,
+            "budget_ms": budget,
+            "within_budget": elapsed_ms <= budget,
+        }
+    return results
+
+
+BENCHMARKS = {
+    "planning": bench_planning,
+    "primitives": bench_primitives,
+    "jitter": bench_jitter,
+    "async": bench_async,
+    "plan_cache": bench_plan_cache,
+    "backends": bench_backends,
+    "memory": bench_memory,
+    "dataset": bench_dataset,
+    "startup": bench_startup,
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--quick", action="store_true", help="smaller inputs and shorter runs")
+    parser.add_argument(
+        "--only", nargs="+", choices=list(BENCHMARKS), help="run only these benchmarks"
+    )
+    parser.add_argument("-o", "--output", help="write JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    report = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "quick": args.quick,
+        "results": {},
+    }
+    for name in args.only or BENCHMARKS:
+        print(f"running {name}...", file=sys.stderr)
+        report["results"][name] = BENCHMARKS[name](args.quick)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,10 +1,16 @@
-import time
-from src.config import DEFAULT_CONFIG
-from src.typing_engine import TypingSimulator
-from src.gui import TypingSimulatorGUI
+import sys
 
 
 def main():
+    if len(sys.argv) > 1:
+        # Any arguments select the headless command-line mode
+        from src.cli import main as cli_main
+
+        sys.exit(cli_main(sys.argv[1:]))
+    # Imported here so the CLI never loads Tk; the GUI itself loads the
+    # typing engine in the background once its window is up
+    from src.gui import TypingSimulatorGUI
+
     app = TypingSimulatorGUI()
     app.run()
 
@@ -0,0 +1,184 @@
+"""asyncio typing engine for driving many simulated typists at once.
+
+Planning and the per-event emission logic are shared with TypingSimulator;
+only the driver carrying out its waits and backend calls differs. Waits
+are awaitable, so a single event loop can interleave thousands of
+sessions, each with its own schedule, random generator and output target.
+"""
+
+import asyncio
+import inspect
+import itertools
+import numpy as np
+from .typing_engine import (
+    STEP_PRESS, STEP_WAIT, STEP_WRITE, Checkpoint, TypingSimulator,
+)
+from .scheduler import AsyncDeadlineScheduler
+from .utils import new_seed
+
+
+async def _emit(result):
+    """Await a target call's result if the target is asynchronous."""
+    if inspect.isawaitable(result):
+        await result
+
+
+class AsyncTypingSimulator(TypingSimulator):
+    """TypingSimulator whose typing methods are coroutines.
+
+    ``backend`` is the session's output target: any object with ``write``
+    and ``press`` methods (and ``paste``, for runs with ``paste_spans``),
+    which may be plain functions or coroutines (for example sending to a
+    socket). Targets take any text, so nothing is pasted for being
+    untypable. Times in metrics and traces are on the event loop's clock.
+    pause(), resume() and stop() must be called from
+    the loop's thread; cancelling the typing task also stops it and records
+    a checkpoint, but leaves a pending error correction unfinished.
+    """
+
+    def __init__(self, config, backend=None, trace=None):
+        super().__init__(config, backend, trace)
+        self.scheduler = AsyncDeadlineScheduler(config.get("SCHEDULER_MAX_LAG_MS", 250) / 1000)
+        self._resumed = None  # asyncio.Event, created inside the running loop
+
+    def stop(self):
+        super().stop()
+        self.scheduler.interrupt()
+        if self._resumed is not None:
+            self._resumed.set()
+
+    def pause(self):
+        super().pause()
+        self.scheduler.interrupt()
+        if self._resumed is not None:
+            self._resumed.clear()
+
+    def resume(self):
+        super().resume()
+        if not self._stop_requested:
+            self.scheduler.interrupt(False)
+        if self._resumed is not None:
+            self._resumed.set()
+
+    def prepare(self):
+        super().prepare()
+        self.scheduler.interrupt(False)
+
+    async def type_text(self, text, seed=None):
+        """Type text with human-like timing without blocking the event loop."""
+        await self.type_stream(text, seed)
+
+    async def replay(self, source, seed):
+        """Re-type a source with exactly the keystrokes and timings of a past run."""
+        await self.type_stream(source, seed)
+
+    async def type_stream(
+        self, source, seed=None, total=None, checkpoint=None, paste_spans=(), estimate=None,
+        start_delay=0.0,
+    ):
+        """Async counterpart of TypingSimulator.type_stream."""
+        windows = self._begin(source, seed, total, checkpoint, paste_spans, estimate)
+        self._resumed = asyncio.Event()
+        self._resumed.set()
+        if self.backend is None:
+            raise ValueError("AsyncTypingSimulator needs an output target")
+        # Plan the first window before anchoring the schedule, then yield so
+        # that sessions started together all finish planning before any of
+        # them starts its clock
+        head = list(itertools.islice(windows, 1))
+        await asyncio.sleep(0)
+        if start_delay > 0:
+            self.scheduler.start()
+            self.scheduler.shift(start_delay)
+            await self.scheduler.wait()  # Cut short by stop() or pause()
+        self._start_clock()
+        steps = self._run(itertools.chain(head, windows), checkpoint)
+        try:
+            await self._drive(steps)
+        except asyncio.CancelledError:
+            steps.close()  # Brings self.position up to date
+            window = self._window
+            if window is not None:
+                self.checkpoint = Checkpoint(
+                    self.seed, window.offset, window.rng_state,
+                    self.position - window.offset, self.position, window.editor_state,
+                )
+            raise
+        finally:
+            self._finish()
+
+    async def _drive(self, steps):
+        """Async counterpart of TypingSimulator._drive, awaiting every step."""
+        backend = self.backend
+        clock = asyncio.get_running_loop().time
+        wait = self._wait
+        reply = None
+        try:
+            while True:
+                op, arg = steps.send(reply)
+                if op == STEP_WAIT:
+                    reply = await wait()
+                    continue
+                reply = clock()
+                if op == STEP_WRITE:
+                    result = backend.write(arg)
+                    if inspect.isawaitable(result):
+                        await result
+                    elif hasattr(backend, "call_cost"):
+                        # Only synchronous targets block the loop for a burst
+                        backend.call_cost += (clock() - reply - backend.call_cost) * 0.1
+                else:
+                    await _emit((backend.press if op == STEP_PRESS else backend.paste)(arg))
+        except StopIteration as done:
+            return done.value
+
+    async def _execute_plan(self, plan, offset=0, first=0):
+        """Async counterpart of TypingSimulator._execute_plan."""
+        return await self._drive(self._plan_steps(plan, offset, first))
+
+    async def _wait(self):
+        """Wait for the next deadline, holding while paused.
+
+        Returns False, possibly early, once the run is stopped.
+        """
+        while await self.scheduler.wait() is None:
+            if self._stop_requested:
+                return False
+            if not self._resumed.is_set():
+                await self._hold()
+        return True
+
+    async def _hold(self):
+        """Async counterpart of TypingSimulator._hold."""
+        loop = asyncio.get_running_loop()
+        paused_at = loop.time()
+        self.progress.publish(self.progress_snapshot())
+        await self._resumed.wait()
+        suspended = loop.time() - paused_at
+        self.scheduler.shift(suspended)
+        self.metrics.shift(suspended)
+        if self.trace is not None:
+            self.trace.shift(suspended)
+        self._next_progress += suspended
+        self.progress.publish(self.progress_snapshot())
+
+    def _untypable(self, keys):
+        return np.zeros(keys.shape, dtype=bool)
+
+
+async def type_concurrently(config, sessions, seed=None):
+    """Type several texts at once, one simulated typist per ``(text, target)``.
+
+    Session ``i`` is seeded with ``seed + i`` (a fresh seed when ``seed`` is
+    None), so a whole load test can be replayed. Returns the simulators in
+    session order; their metrics hold each session's realised timing.
+    """
+    base = new_seed() if seed is None else seed
+    simulators = []
+    tasks = []
+    for i, (text, target) in enumerate(sessions):
+        simulator = AsyncTypingSimulator(config, backend=target)
+        simulators.append(simulator)
+        tasks.append(simulator.type_stream(text, (base + i) % 2**64))
+    await asyncio.gather(*tasks)
+    return simulators
@@ -0,0 +1,261 @@
+"""Keystroke output backends.
+
+Every backend exposes the same small interface: ``write`` for text,
+``press`` for named keys such as "backspace" and ``paste`` for text it
+cannot type key by key, with ``typable`` telling which characters those
+are. Display-dependent libraries are only imported when a backend is
+actually created.
+"""
+
+import os
+import string
+import sys
+import time
+import numpy as np
+
+# Modifier held with "v" to paste from the clipboard
+PASTE_MODIFIER = "command" if sys.platform == "darwin" else "ctrl"
+
+
+def _copy_to_clipboard(text):
+    """Put text on the system clipboard (pyperclip ships with pyautogui)."""
+    import pyperclip
+
+    pyperclip.copy(text)
+
+
+def _char_mask(keys, predicate):
+    """Evaluate a per-character predicate once per distinct character."""
+    keys = np.asarray(keys, dtype="<U1")
+    unique, inverse = np.unique(keys, return_inverse=True)
+    return np.array([predicate(char) for char in unique.tolist()], dtype=bool)[inverse]
+
+
+class OutputBackend:
+    """Base class for keystroke output backends."""
+
+    name = "base"
+    call_cost = 0.0  # Average seconds per write() call, measured while typing
+
+    def write(self, text):
+        """Type a string of characters."""
+        raise NotImplementedError
+
+    def press(self, key):
+        """Press and release a named key."""
+        raise NotImplementedError
+
+    def paste(self, text):
+        """Insert text in one clipboard paste. Overwrites the clipboard."""
+        _copy_to_clipboard(text)
+        self.hotkey(PASTE_MODIFIER, "v")
+
+    def hotkey(self, modifier, key):
+        """Press a key while holding a named modifier."""
+        raise NotImplementedError
+
+    def typable(self, keys):
+        """Mask of the characters in a "<U1" array that write() can type."""
+        return np.ones(np.shape(keys), dtype=bool)
+
+    def close(self):
+        """Release any resources held by the backend."""
+
+
+class PyAutoGUIBackend(OutputBackend):
+    """Cross-platform backend built on pyautogui."""
+
+    name = "pyautogui"
+
+    def __init__(self):
+        import pyautogui
+
+        pyautogui.MINIMUM_DURATION = 0  # Remove artificial delay
+        pyautogui.PAUSE = 0  # Remove pause between actions
+        self._pyautogui = pyautogui
+        self._typable = self._typable_chars(pyautogui)
+
+    @staticmethod
+    def _typable_chars(pyautogui):
+        """Characters write() can type; it silently skips any others.
+
+        That is every key of the platform keyboard mapping, plus capitals:
+        write() types them with shift, but KEYBOARD_KEYS lists none.
+        """
+        mapping = getattr(getattr(pyautogui, "platformModule", None), "keyboardMapping", None)
+        if mapping:
+            keys = {key for key, code in mapping.items() if len(key) == 1 and code is not None}
+        else:
+            keys = {key for key in pyautogui.KEYBOARD_KEYS if len(key) == 1}
+        return keys | set(string.ascii_uppercase)
+
+    def write(self, text):
+        self._pyautogui.write(text, interval=0)
+
+    def press(self, key):
+        self._pyautogui.press(key)
+
+    def hotkey(self, modifier, key):
+        self._pyautogui.hotkey(modifier, key)
+
+    def typable(self, keys):
+        return _char_mask(keys, self._typable.__contains__)
+
+
+class XTestBackend(OutputBackend):
+    """Linux X11 backend injecting keys through the XTEST extension.
+
+    Talks to the X server directly via python-xlib and flushes once per
+    call, which skips pyautogui's per-key fail-safe and pause handling.
+    """
+
+    name = "xtest"
+
+    # Named keys understood by press(), mapped to X keysym names
+    KEY_NAMES = {
+        "backspace": "BackSpace",
+        "enter": "Return",
+        "return": "Return",
+        "tab": "Tab",
+        "space": "space",
+        "esc": "Escape",
+        "escape": "Escape",
+        "left": "Left",
+        "right": "Right",
+        "up": "Up",
+        "down": "Down",
+        "home": "Home",
+        "end": "End",
+        "delete": "Delete",
+        "shift": "Shift_L",
+        "ctrl": "Control_L",
+        "command": "Super_L",
+    }
+
+    def __init__(self, display_name=None):
+        from Xlib import X, XK, display
+        from Xlib.ext import xtest
+
+        self._X = X
+        self._XK = XK
+        self._xtest = xtest
+        self.display = display.Display(display_name)
+        self._shift = self.display.keysym_to_keycode(XK.string_to_keysym("Shift_L"))
+        self._keycodes = {}
+
+    def _keysym(self, char):
+        """Map a character to its X keysym."""
+        if char == "\n":
+            return self._XK.string_to_keysym("Return")
+        if char == "\t":
+            return self._XK.string_to_keysym("Tab")
+        code = ord(char)
+        if 0x20 <= code <= 0x7E or 0xA0 <= code <= 0xFF:
+            return code  # Latin-1 keysyms match their code points
+        return 0x01000000 + code  # Unicode keysym range
+
+    def _lookup(self, keysym):
+        """Return (keycode, needs_shift) for a keysym, cached."""
+        entry = self._keycodes.get(keysym)
+        if entry is None:
+            keycode = self.display.keysym_to_keycode(keysym)
+            shifted = bool(keycode) and self.display.keycode_to_keysym(keycode, 0) != keysym
+            entry = self._keycodes[keysym] = (keycode, shifted)
+        return entry
+
+    def _tap(self, keysym):
+        keycode, shifted = self._lookup(keysym)
+        if not keycode:
+            return  # Not on this keyboard map
+        fake_input = self._xtest.fake_input
+        if shifted:
+            fake_input(self.display, self._X.KeyPress, self._shift)
+        fake_input(self.display, self._X.KeyPress, keycode)
+        fake_input(self.display, self._X.KeyRelease, keycode)
+        if shifted:
+            fake_input(self.display, self._X.KeyRelease, self._shift)
+
+    def write(self, text):
+        for char in text:
+            self._tap(self._keysym(char))
+        self.display.sync()
+
+    def press(self, key):
+        self._tap(self._named_keysym(key))
+        self.display.sync()
+
+    def hotkey(self, modifier, key):
+        fake_input = self._xtest.fake_input
+        keycode, _ = self._lookup(self._named_keysym(modifier))
+        fake_input(self.display, self._X.KeyPress, keycode)
+        self._tap(self._named_keysym(key))
+        fake_input(self.display, self._X.KeyRelease, keycode)
+        self.display.sync()
+
+    def typable(self, keys):
+        return _char_mask(keys, lambda char: bool(self._lookup(self._keysym(char))[0]))
+
+    def _named_keysym(self, key):
+        name = self.KEY_NAMES.get(key.lower(), key)
+        return self._XK.string_to_keysym(name)
+
+    def close(self):
+        self.display.close()
+
+
+class RecordingBackend(OutputBackend):
+    """In-memory backend that records events instead of emitting them.
+
+    Each event is a ``(timestamp, action, value)`` tuple where action is
+    "write", "press" or "paste". Useful for tests and headless load runs.
+    """
+
+    name = "recording"
+
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self.events = []
+
+    def write(self, text):
+        self.events.append((self.clock(), "write", text))
+
+    def press(self, key):
+        self.events.append((self.clock(), "press", key))
+
+    def paste(self, text):
+        self.events.append((self.clock(), "paste", text))
+
+    @property
+    def text(self):
+        """The text a plain editor would contain after the recorded events."""
+        typed = []
+        for _, action, value in self.events:
+            if action in ("write", "paste"):
+                typed.extend(value)
+            elif value == "backspace" and typed:
+                typed.pop()
+            elif value == "enter":
+                typed.append("\n")
+        return "".join(typed)
+
+
+BACKENDS = {
+    "pyautogui": PyAutoGUIBackend,
+    "xtest": XTestBackend,
+    "recording": RecordingBackend,
+}
+
+
+def get_backend(name="auto"):
+    """Create an output backend by name, or pick the fastest for this host."""
+    if name == "auto":
+        if sys.platform.startswith("linux") and os.environ.get("DISPLAY"):
+            try:
+                return XTestBackend()
+            except Exception:
+                pass  # python-xlib missing or no usable X server
+        return PyAutoGUIBackend()
+    try:
+        return BACKENDS[name]()
+    except KeyError:
+        raise ValueError(f"Unknown output backend: {name}") from None
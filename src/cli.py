@@ -0,0 +1,200 @@
+"""Headless command-line interface for the typing simulator."""
+
+import argparse
+import json
+import os
+import sys
+import time
+from .config import DEFAULT_CONFIG, SPEED_PRESETS
+from .typing_engine import TypingSimulator
+from .backends import BACKENDS
+from .keyboard_layout import LAYOUTS
+from .sources import iter_file_chunks, iter_text_chunks
+from .utils import new_seed
+
+EXIT_OK = 0
+EXIT_FAILURE = 1
+EXIT_INTERRUPTED = 130
+
+
+def _preset_name(value):
+    """Match a preset name case-insensitively ("ultra-fast" -> "Ultra Fast")."""
+    wanted = value.lower().replace("-", " ").replace("_", " ")
+    for name in SPEED_PRESETS:
+        if name.lower() == wanted:
+            return name
+    choices = ", ".join(SPEED_PRESETS)
+    raise argparse.ArgumentTypeError(f"unknown preset '{value}' (choose from {choices})")
+
+
+def build_parser():
+    """Build the argument parser."""
+    parser = argparse.ArgumentParser(
+        prog="typing-simulator",
+        description="Type text from files or stdin with human-like timing.",
+    )
+    parser.add_argument(
+        "files", nargs="*", metavar="FILE",
+        help="files to type in order; reads stdin when omitted or '-'",
+    )
+    speed = parser.add_argument_group("speed")
+    speed.add_argument(
+        "-p", "--preset", type=_preset_name, default=DEFAULT_CONFIG["SPEED_PRESET"],
+        help="speed preset: " + ", ".join(
+            f"{name} ({data['wpm']} WPM)" for name, data in SPEED_PRESETS.items()
+        ),
+    )
+    speed.add_argument("-w", "--wpm", type=int, help="words per minute (overrides --preset)")
+    speed.add_argument(
+        "--wpm-std", type=int, default=DEFAULT_CONFIG["WPM_STD"],
+        help="speed variation in WPM (default: %(default)s)",
+    )
+    errors = parser.add_argument_group("errors")
+    errors.add_argument(
+        "-e", "--error-rate", type=float, default=DEFAULT_CONFIG["ERROR_RATE"] * 100,
+        help="error rate in percent (default: %(default)s)",
+    )
+    errors.add_argument("--no-errors", action="store_true", help="disable error simulation")
+    errors.add_argument(
+        "--keep-errors", action="store_true", help="leave errors uncorrected"
+    )
+    errors.add_argument(
+        "-l", "--layout", choices=list(LAYOUTS), default=DEFAULT_CONFIG["KEYBOARD_LAYOUT"],
+        help="keyboard layout for adjacent-key errors (default: %(default)s)",
+    )
+    speed.add_argument(
+        "--timing-model", metavar="PATH",
+        help="digraph timing table fit with 'python -m src.timing_model' "
+        "(default: derived from the keyboard layout)",
+    )
+    speed.add_argument(
+        "--no-digraphs", action="store_true",
+        help="time every key pair alike instead of per digraph",
+    )
+    parser.add_argument(
+        "-d", "--start-delay", type=float, default=DEFAULT_CONFIG["START_DELAY"],
+        help="seconds to wait before typing (default: %(default)s)",
+    )
+    parser.add_argument(
+        "-b", "--backend", choices=["auto", *BACKENDS], default=DEFAULT_CONFIG["BACKEND"],
+        help="keystroke output backend (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--no-paste", action="store_true",
+        help="type characters the backend cannot type instead of pasting them "
+        "from the clipboard (they may be dropped)",
+    )
+    editor = parser.add_argument_group("code mode")
+    editor.add_argument(
+        "--code", action="store_true",
+        help="skip indentation and closing brackets the target editor inserts itself",
+    )
+    editor.add_argument(
+        "--auto-indent", choices=["smart", "keep", "off"],
+        default=DEFAULT_CONFIG["CODE_AUTO_INDENT"],
+        help="how the editor indents after Enter: 'smart' adds a level after "
+        "':' or an opening bracket (default: %(default)s)",
+    )
+    editor.add_argument(
+        "--no-auto-close", action="store_true",
+        help="the editor does not auto-close brackets and quotes",
+    )
+    editor.add_argument(
+        "--indent", type=int, default=len(DEFAULT_CONFIG["CODE_INDENT_UNIT"]), metavar="N",
+        help="spaces per indentation level; 0 for a tab (default: %(default)s)",
+    )
+    parser.add_argument(
+        "-s", "--seed", type=int,
+        help="random seed; the same seed, options and text replay the same run",
+    )
+    parser.add_argument(
+        "-t", "--trace", metavar="PATH",
+        help="append a binary keystroke trace to PATH (load with src.trace.load_trace)",
+    )
+    parser.add_argument(
+        "--stats", action="store_true",
+        help="print realised timing metrics as JSON to stderr when done",
+    )
+    parser.add_argument("--debug", action="store_true", help="print every keystroke")
+    return parser
+
+
+def config_from_args(args):
+    """Build a simulator config from parsed arguments."""
+    config = DEFAULT_CONFIG.copy()
+    wpm = args.wpm if args.wpm is not None else SPEED_PRESETS[args.preset]["wpm"]
+    config.update({
+        "WPM_MEAN": wpm,
+        "WPM_STD": args.wpm_std,
+        "SPEED_PRESET": "Custom" if args.wpm is not None else args.preset,
+        "ERROR_RATE": args.error_rate / 100,
+        "ENABLE_ERRORS": not args.no_errors,
+        "KEEP_ERRORS": args.keep_errors,
+        "KEYBOARD_LAYOUT": args.layout,
+        "DIGRAPH_TIMING": not args.no_digraphs,
+        "TIMING_MODEL_FILE": args.timing_model,
+        "START_DELAY": args.start_delay,
+        "BACKEND": args.backend,
+        "PASTE_UNTYPABLE": not args.no_paste,
+        "CODE_MODE": args.code,
+        "CODE_AUTO_INDENT": None if args.auto_indent == "off" else args.auto_indent,
+        "CODE_AUTO_CLOSE": not args.no_auto_close,
+        "CODE_INDENT_UNIT": " " * args.indent if args.indent > 0 else "\t",
+        "SEED": args.seed,
+        "TRACE_FILE": args.trace,
+        "DEBUG": args.debug,
+    })
+    return config
+
+
+def _iter_inputs(paths):
+    """Stream every input in order as one chunked text; '-' means stdin."""
+    for path in paths:
+        if path == "-":
+            yield from iter_text_chunks(sys.stdin)
+        else:
+            yield from iter_file_chunks(path)
+
+
+def main(argv=None):
+    """Run the CLI and return a process exit status."""
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.wpm is not None and args.wpm <= 0:
+        parser.error("--wpm must be positive")
+    if not 0 <= args.error_rate <= 100:
+        parser.error("--error-rate must be between 0 and 100")
+    if args.indent < 0:
+        parser.error("--indent must not be negative")
+
+    paths = args.files or ["-"]
+    model = [args.timing_model] if args.timing_model else []
+    for path in paths + model:
+        if path != "-" and not os.access(path, os.R_OK):
+            print(f"typing-simulator: cannot read '{path}'", file=sys.stderr)
+            return EXIT_FAILURE
+
+    config = config_from_args(args)
+    simulator = TypingSimulator(config)
+    seed = args.seed if args.seed is not None else new_seed()
+    print(f"typing-simulator: seed {seed}", file=sys.stderr)
+    try:
+        if config["START_DELAY"] > 0:
+            print(f"Typing starts in {config['START_DELAY']:g}s...", file=sys.stderr)
+            time.sleep(config["START_DELAY"])
+        simulator.type_stream(_iter_inputs(paths), seed)
+    except KeyboardInterrupt:
+        simulator.stop_typing = True
+        print("typing-simulator: interrupted", file=sys.stderr)
+        return EXIT_INTERRUPTED
+    except Exception as e:
+        print(f"typing-simulator: {e}", file=sys.stderr)
+        return EXIT_FAILURE
+    finally:
+        if args.stats:
+            print(json.dumps(simulator.timing_report(), indent=2), file=sys.stderr)
+    return EXIT_OK
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,171 @@
+"""Editor model for typing source code into auto-indenting editors.
+
+Code editors insert some text by themselves: after Enter they indent the
+new line like the previous one (one level deeper after a block opener),
+and typing an opening bracket or quote also inserts its closer. Typing
+such text verbatim doubles the indentation and leaves stray closers, so in
+code mode the planner asks an EditorModel, for every character, whether
+the editor has already inserted it and which keys must first remove what
+the editor inserted but the text does not contain.
+
+The model follows common editor defaults (VS Code, PyCharm, Sublime):
+
+* Enter copies the current line's indentation; with "smart" indentation a
+  line ending in ":" or an opening bracket adds one INDENT_UNIT.
+* Untouched auto-indentation on a blank line is trimmed by the editor and
+  still carries over to the next line.
+* Backspace in leading spaces goes back to the previous tab stop (a
+  multiple of the indent width) when tab stops are on.
+* Opening brackets always auto-close; quotes auto-close unless they follow
+  a letter, digit or another quote. Typing a closer that sits right after
+  the cursor types over it.
+"""
+
+import numpy as np
+
+AUTO_PAIRS = {"(": ")", "[": "]", "{": "}", '"': '"', "'": "'"}
+PAIR_CHARS = "()[]{}\"'"
+BLOCK_OPENERS = ":([{"
+
+
+class EditorModel:
+    """Tracks what the target editor has inserted on its own.
+
+    State carries over from one call of ``process`` to the next, so a long
+    text can be modelled one planning window at a time; ``state`` and
+    ``restore`` save and rewind it.
+    """
+
+    def __init__(self, auto_indent="smart", auto_close=True, indent_unit="    ", tab_stops=True):
+        self.auto_indent = auto_indent  # "smart", "keep" or None
+        self.auto_close = auto_close
+        self.indent_unit = indent_unit
+        self.tab_stops = tab_stops
+        self.restore(None)
+
+    @classmethod
+    def from_config(cls, config):
+        """Build the model for a config, or return None outside code mode."""
+        if not config.get("CODE_MODE", False):
+            return None
+        return cls(
+            config.get("CODE_AUTO_INDENT", "smart"),
+            config.get("CODE_AUTO_CLOSE", True),
+            config.get("CODE_INDENT_UNIT", "    "),
+            config.get("CODE_TAB_STOPS", True),
+        )
+
+    def state(self):
+        """Snapshot of the model state as a JSON-friendly list."""
+        return [self._auto, self._leading, self._in_indent, self._diverged,
+                self._last, self._prev, self._pending]
+
+    def restore(self, state):
+        """Rewind to a ``state()`` snapshot; None starts a fresh document."""
+        if state is None:
+            state = ["", "", True, False, "", "", ""]
+        (self._auto,  # Indentation the editor put on the current line
+         self._leading,  # Leading whitespace of the text's current line so far
+         self._in_indent,  # Still inside the current line's leading whitespace
+         self._diverged,  # Text's indentation stopped matching the editor's
+         self._last,  # Last non-blank character of the current line
+         self._prev,  # Previous character
+         self._pending) = state  # Auto-inserted closers after the cursor, innermost last
+
+    def finish(self):
+        """Keys that remove what the editor inserted past the end of the text.
+
+        Returns ``(erase, text)``: an erase count as in ``process`` (deletes
+        for closers left after the cursor, backspaces for auto-indentation
+        on a last line the text leaves short), then whitespace to type
+        again where a tab-stop backspace overshot.
+        """
+        if self._pending:
+            return -len(self._pending), ""
+        if self._in_indent and not self._diverged:
+            count, at = self._backspaces(len(self._leading))
+            return count, self._leading[at:]
+        return 0, ""
+
+    def process(self, text):
+        """Model typing ``text``; return ``(auto, erase)`` arrays.
+
+        ``auto`` marks characters the editor has already inserted, which
+        must not be typed. ``erase`` is the number of keys to remove right
+        before a character: backspaces when positive, forward deletes when
+        negative.
+        """
+        n = len(text)
+        auto = np.zeros(n, dtype=bool)
+        erase = np.zeros(n, dtype=np.int16)
+        for i, char in enumerate(text):
+            if self._in_indent:
+                if char in " \t":
+                    depth = len(self._leading)
+                    if not self._diverged:
+                        if depth < len(self._auto) and self._auto[depth] == char:
+                            auto[i] = True
+                        else:
+                            self._diverged = True
+                            self._dedent(auto, erase, i, depth)
+                    self._leading += char
+                    self._prev = char
+                    continue
+                if not self._diverged and len(self._leading) < len(self._auto):
+                    if char == "\n":
+                        self._leading = self._auto  # Blank line: trimmed, but carried over
+                    else:
+                        self._dedent(auto, erase, i, len(self._leading))
+                self._in_indent = False
+            if char == "\n":
+                if self._pending:
+                    # Enter would push the closers onto the next line
+                    erase[i] = -len(self._pending)
+                    self._pending = ""
+                indent = self._leading
+                if self.auto_indent is None:
+                    indent = ""
+                elif self.auto_indent == "smart" and self._last and self._last in BLOCK_OPENERS:
+                    indent += self.indent_unit
+                self._auto = indent
+                self._leading = ""
+                self._in_indent = True
+                self._diverged = False
+                self._last = ""
+            elif self.auto_close and char in PAIR_CHARS:
+                if self._pending and char == self._pending[-1]:
+                    self._pending = self._pending[:-1]  # Typed over
+                elif char in AUTO_PAIRS and (
+                    char not in "\"'" or not (self._prev.isalnum() or self._prev in ("\"", "'"))
+                ):
+                    self._pending += AUTO_PAIRS[char]
+            if char not in " \t\n":
+                self._last = char
+            self._prev = char
+        return auto, erase
+
+    def _dedent(self, auto, erase, i, column):
+        """Backspace the auto-indentation down to ``column`` before key ``i``.
+
+        A tab-stop backspace can overshoot a column off the indent grid; the
+        whitespace between is then typed again after the backspaces. Only
+        keys of the current window can be re-typed, which leaves a dedent
+        off the grid that straddles a window boundary short.
+        """
+        count, at = self._backspaces(column)
+        first = max(i - (column - at), 0)
+        auto[first:i] = False
+        erase[first] = count
+
+    def _backspaces(self, column):
+        """Return ``(backspaces, column reached)`` to cut the auto-indentation."""
+        at = len(self._auto)
+        width = len(self.indent_unit)
+        count = 0
+        while at > column:
+            if self.tab_stops and width and not self._auto[:at].strip(" "):
+                at = (at - 1) // width * width
+            else:
+                at -= 1
+            count += 1
+        return count, at
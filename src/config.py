@@ -1,5 +1,8 @@
 """Configuration settings for the typing simulator."""
 
+from collections import namedtuple
+from types import MappingProxyType
+
 SPEED_PRESETS = {
     "Slow": {"wpm": 30, "desc": "30 WPM - Beginner typing speed"},
     "Medium": {"wpm": 60, "desc": "60 WPM - Average typing speed"},
@@ -14,15 +17,121 @@ DEFAULT_CONFIG = {
     "WPM_STD": 15,
     "MIN_CPM": 50,
     "SPEED_PRESET": "Medium",
+    # Fit thinking pauses and error corrections into the time typing at
+    # WPM_MEAN takes, so the achieved speed matches the target; off, they
+    # add to it and fast presets type well below their label
+    "KEEP_TARGET_WPM": True,
     # Error simulation
     "ERROR_RATE": 0.10,  # Default to 10% error rate
     "ERROR_TYPES": ["adjacent", "transpose", "omit"],
     "ENABLE_ERRORS": True,  # New setting for error toggle
+    "KEYBOARD_LAYOUT": "qwerty",  # qwerty, azerty, qwertz, dvorak or colemak
+    # Per-digraph timing: pairs on alternating hands are quicker than pairs
+    # on the same finger. TIMING_MODEL_FILE is a table fit to recorded traces
+    # (python -m src.timing_model); None uses the layout's geometric prior
+    "DIGRAPH_TIMING": True,
+    "TIMING_MODEL_FILE": None,
     # Timing settings (milliseconds)
     "CORRECTION_DELAY_MIN": 200,
     "CORRECTION_DELAY_MAX": 400,
     "BACKSPACE_DELAY": 100,
+    # Keystroke scheduling (milliseconds)
+    "SCHEDULER_SPIN_MS": 2,  # Busy-wait the last stretch before each key
+    "SCHEDULER_MAX_LAG_MS": 250,  # Re-anchor the schedule after longer stalls
+    "BURST_MODE": True,  # Merge keys due faster than one backend call
+    # Insert characters the backend cannot type (accents, emoji, CJK, ...)
+    # with one clipboard paste per run, taking PASTE_DELAY_MS on the schedule
+    "PASTE_UNTYPABLE": True,
+    "PASTE_DELAY_MS": 400,
+    # Code mode: model an editor that auto-indents after Enter ("smart" adds
+    # CODE_INDENT_UNIT after a line ending in ":" or a bracket, "keep" only
+    # copies the indentation) and auto-closes brackets and quotes, and skip
+    # typing what it inserts itself. CODE_TAB_STOPS: backspace in leading
+    # spaces goes back one indent unit, as in most code editors
+    "CODE_MODE": False,
+    "CODE_AUTO_INDENT": "smart",
+    "CODE_AUTO_CLOSE": True,
+    "CODE_INDENT_UNIT": "    ",
+    "CODE_TAB_STOPS": True,
+    "PLAN_WINDOW": 4096,  # Characters planned at a time when streaming
+    "PROGRESS_INTERVAL_MS": 100,  # How often progress snapshots are published
+    # Compiled plan cache: an in-memory LRU plus, when given a budget, files
+    # under the user's cache directory (PLAN_CACHE_DIR overrides it). The disk
+    # tier only pays off for texts replayed or resumed across sessions
+    "PLAN_CACHE": True,
+    "PLAN_CACHE_MEMORY_MB": 64,
+    "PLAN_CACHE_DISK_MB": 0,
+    "PLAN_CACHE_DIR": None,
+    # Keystroke output: "auto", "pyautogui", "xtest" or "recording"
+    "BACKEND": "auto",
+    # Keystroke trace: binary file to append records to (None disables)
+    "TRACE_FILE": None,
+    "TRACE_CAPACITY": 65536,  # Records buffered in memory between flushes
+    # Random seed for reproducible runs (None draws a fresh seed per run)
+    "SEED": None,
     # Initial delay before typing starts
     "START_DELAY": 3,
     "DEBUG": False,
 }
+
+# Config entries that change what compile_plan produces
+PLAN_CONFIG_KEYS = (
+    "MIN_CPM",
+    "KEEP_TARGET_WPM",
+    "ENABLE_ERRORS",
+    "ERROR_TYPES",
+    "KEEP_ERRORS",
+    "BACKSPACE_DELAY",
+    "KEYBOARD_LAYOUT",
+    "DIGRAPH_TIMING",
+    "TIMING_MODEL_FILE",
+    "CODE_MODE",
+    "CODE_AUTO_INDENT",
+    "CODE_AUTO_CLOSE",
+    "CODE_INDENT_UNIT",
+    "CODE_TAB_STOPS",
+)
+
+# Immutable snapshot of a config, as the typing engine reads it. Replacing
+# a simulator's snapshot is a single reference swap, so another thread can
+# publish new settings while a run is typing
+Settings = namedtuple(
+    "Settings",
+    [
+        "config",  # Read-only copy of the config dict, lists made tuples
+        "cpm_mean",  # Mean speed (characters per minute)
+        "cpm_std",  # Speed variation (characters per minute)
+        "error_rate",
+        "debug",
+        "burst_mode",
+        "paste_untypable",
+        "paste_delay",  # ms
+        "progress_interval",  # s
+        "plan_window",
+        "planning",  # Everything that shapes compiled plans, for change checks
+    ],
+)
+
+
+def compile_settings(config):
+    """Freeze a config dict into a Settings snapshot."""
+    frozen = MappingProxyType({
+        key: tuple(value) if isinstance(value, list) else value
+        for key, value in config.items()
+    })
+    cpm_mean = frozen["WPM_MEAN"] * 5
+    cpm_std = frozen["WPM_STD"] * 5
+    error_rate = frozen["ERROR_RATE"]
+    return Settings(
+        frozen,
+        cpm_mean,
+        cpm_std,
+        error_rate,
+        bool(frozen.get("DEBUG", False)),
+        frozen.get("BURST_MODE", True),
+        frozen.get("PASTE_UNTYPABLE", True),
+        frozen.get("PASTE_DELAY_MS", 400),
+        frozen.get("PROGRESS_INTERVAL_MS", 100) / 1000,
+        frozen.get("PLAN_WINDOW", 4096),
+        (cpm_mean, cpm_std, error_rate, *(frozen.get(key) for key in PLAN_CONFIG_KEYS)),
+    )
@@ -0,0 +1,305 @@
+"""Synthetic keystroke datasets.
+
+Simulates whole corpora through the planner without emitting a single key:
+every document is compiled into its keystroke plan and expanded into the
+events a live run would emit, on a virtual clock that follows the planned
+delays exactly. Documents are simulated in shards across a process pool and
+each shard is stored column by column, as plain .npy files that load
+memory-mapped:
+
+    dataset/
+        manifest.json
+        shard-00000/  document.npy offsets.npy time.npy key.npy planned.npy error.npy
+        shard-00001/  ...
+
+``offsets`` holds each document's first event plus the total, so the
+events of document ``document[i]`` (its index in the input) are rows
+``offsets[i]:offsets[i + 1]`` of every column. Document ``i`` is simulated
+from a seed derived from the dataset seed and ``i`` alone, so the output
+does not depend on the number of workers or the shard size:
+
+    python -m src.dataset corpus/*.txt -o dataset --workers 8 --seed 1
+"""
+
+import argparse
+import json
+import os
+import pathlib
+import shutil
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+import numpy as np
+from .config import DEFAULT_CONFIG, SPEED_PRESETS
+from .keyboard_layout import LAYOUTS
+from .cli import _preset_name
+from .planner import text_to_keys
+from .trace import TRACE_CLEAN, TRACE_CORRECTION, TRACE_DTYPE, TRACE_ERROR
+from .utils import new_seed
+
+DATASET_VERSION = 1
+SHARD_DOCUMENTS = 256  # Documents simulated and stored per shard
+# Stored columns; a trace's "actual" gap always equals "planned" here
+COLUMNS = ("time", "key", "planned", "error")
+
+
+def document_seed(seed, index):
+    """Seed of document ``index`` in a dataset generated from ``seed``."""
+    state = np.random.SeedSequence([seed, index]).generate_state(2, np.uint32)
+    return int(state[0]) | int(state[1]) << 32
+
+
+def plan_events(plan, tail=(0, "")):
+    """Expand a keystroke plan into the events a live run would emit.
+
+    Returns TRACE_DTYPE records with ``time`` in seconds since the first
+    planned gap started. Each key's erase keys, slip and correction follow
+    the engine's order; keys the editor inserted are skipped. ``tail`` is
+    an EditorModel ``finish()`` result typed after the last key.
+    """
+    auto = plan["auto"]
+    erase = np.abs(plan["erase"].astype(np.int64))
+    slipped = plan["wrong"] != ""
+    corrected = slipped & plan["correct"]
+    main = np.where(auto, 0, 1 + 2 * corrected)  # Key, or slip + backspace + key
+    counts = erase + main
+    starts = np.cumsum(counts) - counts
+    events = np.zeros(int(counts.sum()), dtype=TRACE_DTYPE)
+
+    # The key's whole planned gap goes before its first event; erase keys
+    # and the key itself follow without a gap, as the engine emits them
+    gap = plan["pause"] + plan["delay"]
+    typed = counts > 0
+    events["planned"][starts[typed]] = gap[typed]
+    erasing = np.flatnonzero(erase)
+    runs = erase[erasing]
+    within = np.arange(runs.sum()) - np.repeat(np.cumsum(runs) - runs, runs)
+    events["key"][np.repeat(starts[erasing], runs) + within] = np.where(
+        np.repeat(plan["erase"][erasing] > 0, runs), "\b", "\x7f"
+    )
+
+    keyed = np.flatnonzero(main)
+    at = starts[keyed] + erase[keyed]
+    events["key"][at] = np.where(slipped[keyed], plan["wrong"][keyed], plan["key"][keyed])
+    events["error"][at] = np.where(slipped[keyed], TRACE_ERROR, TRACE_CLEAN)
+    fixed = np.flatnonzero(corrected)
+    at = starts[fixed] + erase[fixed]
+    events["key"][at + 1] = "\b"
+    events["planned"][at + 1] = plan["hesitation"][fixed]
+    events["key"][at + 2] = plan["key"][fixed]
+    events["planned"][at + 2] = plan["backspace"][fixed]
+    events["error"][at + 1] = TRACE_CORRECTION
+    events["error"][at + 2] = TRACE_CORRECTION
+
+    count, text = tail
+    if count or text:
+        extra = np.zeros(abs(count) + len(text), dtype=TRACE_DTYPE)
+        extra["key"][:abs(count)] = "\b" if count > 0 else "\x7f"
+        extra["key"][abs(count):] = text_to_keys(text)
+        events = np.concatenate((events, extra))
+    events["actual"] = events["planned"]
+    events["time"] = np.cumsum(events["planned"], dtype=np.float64) / 1000
+    return events
+
+
+def _simulate_shard(directory, shard, first, documents, config, seed):
+    """Worker: simulate one shard of documents and store its columns."""
+    from .typing_engine import TypingSimulator  # Loaded once per worker process
+
+    simulator = TypingSimulator(config)
+    columns = {name: [] for name in COLUMNS}
+    offsets = [0]
+    for index, document in enumerate(documents, first):
+        if isinstance(document, os.PathLike):
+            with open(document, encoding="utf-8", errors="replace") as f:
+                document = f.read()
+        plan = simulator.plan(document, document_seed(seed, index))
+        tail = simulator.editor.finish() if simulator.editor is not None else (0, "")
+        events = plan_events(plan, tail)
+        for name in COLUMNS:
+            columns[name].append(events[name])
+        offsets.append(offsets[-1] + len(events))
+
+    # Written under a temporary name so a crash never leaves a partial shard
+    name = f"shard-{shard:05d}"
+    partial = os.path.join(directory, name + ".partial")
+    os.makedirs(partial, exist_ok=True)
+    np.save(os.path.join(partial, "document.npy"),
+            np.arange(first, first + len(documents), dtype=np.int64))
+    np.save(os.path.join(partial, "offsets.npy"), np.array(offsets, dtype=np.int64))
+    for column, parts in columns.items():
+        np.save(os.path.join(partial, column + ".npy"),
+                np.concatenate(parts) if parts else np.zeros(0, TRACE_DTYPE[column]))
+    final = os.path.join(directory, name)
+    if os.path.exists(final):
+        shutil.rmtree(final)  # Left by an interrupted earlier run
+    os.replace(partial, final)
+    return name, len(documents), offsets[-1]
+
+
+def _shards(documents, size):
+    """Group documents into ``(first index, list)`` shards of ``size``."""
+    batch, first = [], 0
+    for document in documents:
+        batch.append(document)
+        if len(batch) == size:
+            yield first, batch
+            first += size
+            batch = []
+    if batch:
+        yield first, batch
+
+
+def generate_dataset(
+    documents, directory, config=None, seed=None, workers=None, shard_size=SHARD_DOCUMENTS
+):
+    """Simulate typing every document and write the dataset to ``directory``.
+
+    ``documents`` is an iterable of strings, or of ``pathlib.Path`` objects
+    that workers read themselves; it is consumed lazily, with at most two
+    shards per worker in flight. Returns the manifest, also saved as
+    ``manifest.json``.
+    """
+    config = dict(DEFAULT_CONFIG if config is None else config)
+    # Every document is planned once; caching millions of plans only costs
+    config["PLAN_CACHE"] = False
+    seed = new_seed() if seed is None else seed
+    workers = workers or os.cpu_count() or 1
+    os.makedirs(directory, exist_ok=True)
+    start = time.perf_counter()
+    shards = []
+    pending = set()
+    jobs = _shards(documents, shard_size)
+    with ProcessPoolExecutor(workers) as pool:
+        for number, (first, batch) in enumerate(jobs):
+            if len(pending) >= 2 * workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                shards.extend(future.result() for future in done)
+            pending.add(pool.submit(
+                _simulate_shard, directory, number, first, batch, config, seed
+            ))
+        shards.extend(future.result() for future in wait(pending)[0])
+    shards.sort()
+    manifest = {
+        "version": DATASET_VERSION,
+        "seed": seed,
+        "config": config,
+        "columns": {name: TRACE_DTYPE[name].str for name in COLUMNS},
+        "documents": sum(count for _, count, _ in shards),
+        "events": sum(events for _, _, events in shards),
+        "shards": [name for name, _, _ in shards],
+        "seconds": time.perf_counter() - start,
+    }
+    with open(os.path.join(directory, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def load_shard(path):
+    """Memory-map one shard directory as ``{column: array}``."""
+    return {
+        name: np.load(os.path.join(path, name + ".npy"), mmap_mode="r")
+        for name in ("document", "offsets", *COLUMNS)
+    }
+
+
+def iter_documents(directory):
+    """Yield ``(document index, TRACE_DTYPE events)`` for a whole dataset.
+
+    The events load straight into tools that take traces, e.g.
+    ``DigraphModel.fit``.
+    """
+    with open(os.path.join(directory, "manifest.json")) as f:
+        manifest = json.load(f)
+    if manifest.get("version") != DATASET_VERSION:
+        raise ValueError(f"Unsupported dataset version in {directory}")
+    for name in manifest["shards"]:
+        shard = load_shard(os.path.join(directory, name))
+        offsets = shard["offsets"]
+        for i, index in enumerate(shard["document"].tolist()):
+            rows = slice(offsets[i], offsets[i + 1])
+            events = np.zeros(rows.stop - rows.start, dtype=TRACE_DTYPE)
+            for column in COLUMNS:
+                events[column] = shard[column][rows]
+            events["actual"] = events["planned"]
+            yield index, events
+
+
+def _iter_documents(paths, lines):
+    """Documents named on the command line: whole files, or their lines."""
+    for path in paths:
+        if not lines:
+            yield pathlib.Path(path)
+            continue
+        with open(path, encoding="utf-8", errors="replace") as f:
+            for line in f:
+                line = line.rstrip("\n")
+                if line:
+                    yield line
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Simulate typing a corpus and write a synthetic keystroke dataset."
+    )
+    parser.add_argument("files", nargs="+", metavar="FILE", help="one document per file")
+    parser.add_argument("-o", "--output", required=True, help="dataset directory")
+    parser.add_argument(
+        "--lines", action="store_true", help="treat every non-empty line as a document"
+    )
+    parser.add_argument(
+        "-j", "--workers", type=int, default=os.cpu_count(),
+        help="worker processes (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--shard-size", type=int, default=SHARD_DOCUMENTS,
+        help="documents per shard (default: %(default)s)",
+    )
+    parser.add_argument(
+        "-p", "--preset", type=_preset_name, default=DEFAULT_CONFIG["SPEED_PRESET"],
+        help="speed preset: " + ", ".join(SPEED_PRESETS),
+    )
+    parser.add_argument("-w", "--wpm", type=int, help="words per minute (overrides --preset)")
+    parser.add_argument(
+        "-e", "--error-rate", type=float, default=DEFAULT_CONFIG["ERROR_RATE"] * 100,
+        help="error rate in percent (default: %(default)s)",
+    )
+    parser.add_argument(
+        "-l", "--layout", choices=list(LAYOUTS), default=DEFAULT_CONFIG["KEYBOARD_LAYOUT"],
+        help="keyboard layout (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--code", action="store_true", help="model an auto-indenting code editor"
+    )
+    parser.add_argument("-s", "--seed", type=int, help="dataset seed (default: random)")
+    args = parser.parse_args(argv)
+    if args.workers < 1 or args.shard_size < 1:
+        parser.error("--workers and --shard-size must be positive")
+    if os.path.exists(os.path.join(args.output, "manifest.json")):
+        parser.error(f"{args.output} already holds a dataset")
+
+    config = dict(
+        DEFAULT_CONFIG,
+        WPM_MEAN=args.wpm if args.wpm is not None else SPEED_PRESETS[args.preset]["wpm"],
+        ERROR_RATE=args.error_rate / 100,
+        KEYBOARD_LAYOUT=args.layout,
+        CODE_MODE=args.code,
+    )
+    try:
+        manifest = generate_dataset(
+            _iter_documents(args.files, args.lines), args.output, config, args.seed,
+            args.workers, args.shard_size,
+        )
+    except (OSError, ValueError) as e:
+        print(f"dataset: {e}", file=sys.stderr)
+        return 1
+    print(
+        f"dataset: {manifest['documents']} documents, {manifest['events']} events "
+        f"in {manifest['seconds']:.1f}s (seed {manifest['seed']})",
+        file=sys.stderr,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
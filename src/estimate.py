@@ -0,0 +1,160 @@
+"""Upfront run duration estimates and live ETAs.
+
+Estimating is split in two so it can follow a slider: ``profile_text``
+makes one vectorised pass over the text and counts what the settings do
+not change (keys to type, expected pause time, keys errors can land on),
+then ``estimate_run`` combines a profile with a Settings snapshot in
+constant time, using expected values of the planner's distributions
+instead of drawing a plan.
+"""
+
+from collections import namedtuple
+import numpy as np
+from .code_mode import EditorModel
+from .features import text_features
+from .keyboard_layout import get_layout_index
+from .layouts import LAYOUTS
+from .planner import CODE_FRAGILE_KEYS, CORRECTION_HESITATION, PAUSE_RANGES, PAUSE_RULES
+from .planner import speed_error_rate, text_to_keys
+from .sources import iter_text_chunks, iter_windows
+
+PROFILE_WINDOW = 64 * 1024  # Characters profiled at a time
+ETA_PRIOR_CHARS = 500  # Typed characters after which realised pace and estimate weigh equally
+
+# Gauss-Hermite nodes and weights for expectations over a standard normal
+_NODES, _WEIGHTS = np.polynomial.hermite_e.hermegauss(32)
+_WEIGHTS = _WEIGHTS / _WEIGHTS.sum()
+
+TextProfile = namedtuple(
+    "TextProfile",
+    [
+        "chars",  # Characters in the text
+        "typed",  # Keys typed for them (fewer in code mode)
+        "erased",  # Backspaces and deletes removing editor insertions
+        "editable",  # Typed keys errors can land on
+        "transposable",  # Editable keys a transposition error gets typed on
+        "adjacent",  # Per layout: expected editable keys an adjacent-key error gets typed on
+        "pause_ms",  # Expected total of human pauses
+    ],
+)
+
+Estimate = namedtuple(
+    "Estimate",
+    [
+        "seconds",  # Expected typing time, countdown and start delay excluded
+        "keystrokes",  # Expected keys pressed, corrections included
+        "errors",  # Expected slips typed, as counted in TypingMetrics.errors
+    ],
+)
+
+
+def _pause_expectation(features):
+    """Expected pause (ms) before each key given its text features."""
+    expected = np.zeros(len(features))
+    none_yet = np.ones(len(features))  # Chance no higher priority kind fired
+    kinds = {}
+    for kind, feature, chance in PAUSE_RULES:
+        kinds.setdefault(kind, []).append((feature, chance))
+    for kind, rules in kinds.items():  # Highest priority first
+        silent = np.ones(len(features))
+        for feature, chance in rules:
+            silent *= 1 - chance * features[feature]
+        expected += none_yet * (1 - silent) * np.mean(PAUSE_RANGES[kind])
+        none_yet *= silent
+    return expected
+
+
+def profile_text(source, config):
+    """Count what a run over ``source`` costs independently of speed and errors.
+
+    ``source`` is anything ``TypingSimulator.type_stream`` accepts. Only
+    the code mode settings of ``config`` matter.
+    """
+    editor = EditorModel.from_config(config)
+    # Code mode drops slips onto keys the editor may handle by itself
+    fragile = CODE_FRAGILE_KEYS if editor is not None else []
+    chars = typed = erased = editable = transposable = 0
+    adjacent = dict.fromkeys(LAYOUTS, 0.0)
+    pause_ms = 0.0
+    for _, before, text, after in iter_windows(iter_text_chunks(source), PROFILE_WINDOW):
+        context = text_to_keys(before + text)
+        keys = context[len(before):]
+        chars += keys.size
+        pause_ms += _pause_expectation(text_features(context)[len(before):]).sum()
+        if editor is None:
+            typed += keys.size
+            mask = np.ones(keys.size, dtype=bool)
+        else:
+            auto, erase = editor.process(text)
+            typed += keys.size - np.count_nonzero(auto)
+            erased += int(np.abs(erase).sum())
+            mask = ~(auto | (erase != 0) | np.isin(keys, fragile))
+        editable += np.count_nonzero(mask)
+        # A transposition types the next character (the key itself at the end)
+        following = text_to_keys(text[1:] + (after[:1] or text[-1:]))
+        transposable += np.count_nonzero(mask & ~np.isin(following, fragile))
+        for layout in LAYOUTS:
+            adjacent[layout] += get_layout_index(layout).slip_chance(keys[mask], fragile).sum()
+    return TextProfile(
+        chars, typed, erased, editable, transposable,
+        {layout: float(count) for layout, count in adjacent.items()}, float(pause_ms),
+    )
+
+
+def estimate_run(profile, settings):
+    """Expected duration and keystrokes of typing a profiled text with ``settings``."""
+    config = settings.config
+    cpm_mean = settings.cpm_mean
+    backspace = config.get("BACKSPACE_DELAY", 100)
+    if cpm_mean > 1000000:  # Ultra-fast mode, as in generate_delays
+        cpm = np.full(_NODES.size, float(cpm_mean))
+        delay = 0.001
+    else:
+        cpm = np.maximum(cpm_mean + settings.cpm_std * _NODES, config["MIN_CPM"])
+        delay = _WEIGHTS @ np.maximum(60000 / cpm, 0.001)
+
+    errors = corrected = 0.0
+    error_types = config["ERROR_TYPES"]
+    if config.get("ENABLE_ERRORS", True) and error_types:
+        # The planner's speed-dependent error rate, averaged over the speed
+        # spread, times the keys a drawn error types a slip on: omissions
+        # type nothing and adjacent-key errors need a neighbour
+        rate = speed_error_rate(settings.error_rate, cpm, cpm_mean)
+        typable = {
+            "adjacent": profile.adjacent[config.get("KEYBOARD_LAYOUT", "qwerty")],
+            "transpose": profile.transposable,
+            "omit": 0,
+        }
+        slips = sum(typable.get(error_type, profile.editable) for error_type in error_types)
+        errors = slips / len(error_types) * (_WEIGHTS @ np.clip(rate, 0, 1))
+        if not config.get("KEEP_ERRORS", False):
+            corrected = errors
+
+    if config.get("KEEP_TARGET_WPM", True):
+        # The planner fits pauses and corrections into this budget
+        ms = profile.typed * 60000 / cpm_mean
+    else:
+        ms = (
+            profile.typed * delay + profile.pause_ms + profile.erased * backspace
+            + corrected * (np.mean(CORRECTION_HESITATION) + backspace)
+        )
+    return Estimate(
+        float(ms) / 1000, round(profile.typed + profile.erased + 2 * corrected), float(errors)
+    )
+
+
+def eta(remaining, typed, elapsed, expected_pace=None):
+    """Seconds left for ``remaining`` characters.
+
+    Blends the pace realised over ``typed`` characters in ``elapsed``
+    seconds with an upfront ``expected_pace`` (seconds per character),
+    trusting the realised pace more as the run goes on. Returns None while
+    there is nothing to go by.
+    """
+    if typed <= 0:
+        return None if expected_pace is None else remaining * expected_pace
+    pace = elapsed / typed
+    if expected_pace is not None:
+        weight = typed / (typed + ETA_PRIOR_CHARS)
+        pace = weight * pace + (1 - weight) * expected_pace
+    return remaining * pace
@@ -0,0 +1,46 @@
+"""Per-position text features for the keystroke planner.
+
+One vectorised scan classifies every character by the text right before
+it, so pause and timing rules become boolean masks over these arrays
+instead of slicing and re-testing the text for each key.
+"""
+
+import numpy as np
+
+FEATURE_DTYPE = np.dtype([
+    ("alpha", "?"),  # The character itself is a letter
+    ("sentence_end", "?"),  # Follows ".", "!", "?" or a newline
+    ("comma", "?"),  # Follows a comma
+    ("word_length", "<u2"),  # Letters in the run right before it (capped)
+    ("long_word", "?"),  # Follows at least LONG_WORD letters in a row
+    ("transition", "?"),  # Letter after non-letter or the other way round
+])
+
+SENTENCE_ENDS = (".", "!", "?", "\n")
+LONG_WORD = 5  # Letters that make a word long enough to hesitate after
+MAX_WORD_LENGTH = np.iinfo(np.uint16).max
+
+
+def text_features(keys):
+    """Classify every position of a "<U1" key array in one pass.
+
+    Features describe the text before each key, so the first position
+    never follows anything.
+    """
+    n = keys.size
+    features = np.zeros(n, dtype=FEATURE_DTYPE)
+    if n == 0:
+        return features
+    alpha = np.char.isalpha(keys)
+    features["alpha"] = alpha
+    prev = keys[:-1]
+    features["sentence_end"][1:] = np.isin(prev, SENTENCE_ENDS)
+    features["comma"][1:] = prev == ","
+    # Length of the letter run ending at each character: distance back to
+    # the last non-letter
+    position = np.arange(1, n + 1)
+    last_break = np.maximum.accumulate(np.where(alpha, 0, position))
+    features["word_length"][1:] = np.minimum(position - last_break, MAX_WORD_LENGTH)[:-1]
+    features["long_word"] = features["word_length"] >= LONG_WORD
+    features["transition"][1:] = alpha[1:] != alpha[:-1]
+    return features
@@ -1,11 +1,33 @@
 import tkinter as tk
-from tkinter import ttk
+from tkinter import ttk, filedialog, messagebox
 import threading
-import time
+import queue
 import json
 import os
-from .typing_engine import TypingSimulator
-from .config import DEFAULT_CONFIG, SPEED_PRESETS  # Added SPEED_PRESETS import
+import importlib
+from .config import DEFAULT_CONFIG, SPEED_PRESETS, compile_settings  # Added SPEED_PRESETS import
+from .layouts import LAYOUTS
+from .sources import FileDocument
+from .text_stats import TextStats, count_words, insert_delta, delete_delta
+
+PROGRESS_POLL_MS = 100  # How often the progress panel drains engine snapshots
+WORD_COUNT_DEBOUNCE_MS = 150  # Delay before refreshing the word count label
+BACKGROUND_COUNT_CHARS = 100_000  # Edits larger than this are counted off the UI thread
+CODE_MODE_KEYS = (  # Config entries a text profile depends on
+    "CODE_MODE", "CODE_AUTO_INDENT", "CODE_AUTO_CLOSE", "CODE_INDENT_UNIT", "CODE_TAB_STOPS"
+)
+
+
+def format_duration(seconds):
+    """Format seconds as "45s", "3m 05s" or "1h 07m"."""
+    seconds = int(round(seconds))
+    if seconds < 60:
+        return f"{seconds}s"
+    minutes, seconds = divmod(seconds, 60)
+    if minutes < 60:
+        return f"{minutes}m {seconds:02d}s"
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h {minutes:02d}m"
 
 
 class ToggleButton(ttk.Checkbutton):
@@ -39,17 +61,52 @@ class TypingSimulatorGUI:
 
         self.root.geometry(f"{window_width}x{window_height}+{x}+{y}")
         self.config = DEFAULT_CONFIG.copy()
-        self.simulator = TypingSimulator(self.config)
+        self._simulator = None  # Created on first use; see the simulator property
         self.typing_thread = None
         self.is_typing = False
         self.countdown_label = None
         self.countdown_value = 3  # Use 3 seconds for countdown, not 5
+        self._countdown_job = None  # Pending root.after id of the countdown
         self.instructions_shown = False
+        self.text_stats = TextStats()
+        self._stats_results = queue.Queue()  # Filled by background counters
+        self._stats_pending = 0  # Background counts not yet applied
+        self._word_count_job = None
+        self._recount_job = None  # Pending full word recount
+        self._typing_error = None  # Set by the typing thread if it fails
+        self.document = None  # Open FileDocument typed instead of the text area
+        self._opening = 0  # Number of the latest file open, indexed in the background
+        self._open_results = queue.Queue()  # Filled by background file indexers
+        self._page = 0  # Preview page of the open document
+        self._run_source = None  # Text (or file identity) of the current or last run
+        self._resume_source = None  # What the simulator's checkpoint belongs to
+        self._estimate_source = None  # (identity, text or FileDocument) being estimated
+        self._profile = None  # (key, TextProfile) of the last profiled source
+        self._profiling = None  # Key of the profile being computed in the background
+        self._profile_results = queue.Queue()  # Filled by background profilers
 
         self.load_preferences()
         self._setup_styles()
         self._apply_theme()
         self._create_widgets()
+        self.root.after_idle(self._preload_engine)
+
+    @property
+    def simulator(self):
+        """The typing engine, imported and created on first use"""
+        if self._simulator is None:
+            from .typing_engine import TypingSimulator
+
+            self._simulator = TypingSimulator(self.config)
+        return self._simulator
+
+    def _preload_engine(self):
+        """Import the engine (and NumPy) off the UI thread once the window is up"""
+        threading.Thread(
+            target=importlib.import_module,
+            args=(".typing_engine", __package__),
+            daemon=True
+        ).start()
 
     def _apply_theme(self):
         """Apply dark theme colors with better contrast"""
@@ -120,6 +177,16 @@ class TypingSimulatorGUI:
         )
         self.countdown_label.pack(pady=5)
 
+        # Upfront duration estimate, then the live ETA during a run
+        self.estimate_label = ttk.Label(
+            left_pane,
+            text="",
+            font=('Segoe UI', 11),
+            background="#1a1a1a",
+            foreground="#8ab4f8"
+        )
+        self.estimate_label.pack()
+
         # Text area and its controls in left pane
         text_frame = ttk.Frame(left_pane)
         text_frame.pack(fill="both", expand=True)
@@ -133,10 +200,32 @@ class TypingSimulatorGUI:
             from_=8,
             to=24,
             value=self.font_size,
-            command=lambda s: self.text_area.configure(font=("Segoe UI", int(float(s)))),
+            command=self._update_font_size,
             orient="horizontal"
         )
         font_scale.pack(side="left", fill="x", expand=True, padx=5)
+        paste_button = ttk.Button(
+            font_controls,
+            text="Paste Span",
+            command=self._toggle_paste_span
+        )
+        paste_button.pack(side="right", padx=5)
+        self._create_tooltip(
+            paste_button,
+            "Insert the selected text with one clipboard paste\n"
+            "instead of typing it (Ctrl+Shift+V)"
+        )
+        open_button = ttk.Button(
+            font_controls,
+            text="Open File",
+            command=self.open_file
+        )
+        open_button.pack(side="right", padx=5)
+        self._create_tooltip(
+            open_button,
+            "Type a text file straight from disk; only a preview\n"
+            "is loaded, so very long documents stay fast (Ctrl+O)"
+        )
 
         # Text area with dark theme
         self.text_area = tk.Text(
@@ -151,19 +240,19 @@ class TypingSimulatorGUI:
             undo=True  # Enable undo/redo
         )
         self.text_area.pack(fill="both", expand=True, pady=5)
+        self.text_area.tag_configure("paste", background="#3c4043")
+        self._create_file_preview(text_frame)
 
         # Word count label below text area
         self.word_count_label = ttk.Label(
             text_frame,
-            text="Words: 0",
+            text="Words: 0  Characters: 0",
             font=("Segoe UI", 10),
             background="#1a1a1a",
             foreground="#8ab4f8"
         )
         self.word_count_label.pack(anchor="w", padx=5, pady=(0, 5))
-        self.text_area.bind("<KeyRelease>", self._update_word_count)
-        self.text_area.bind("<FocusIn>", self._update_word_count)
-        self.text_area.bind("<ButtonRelease>", self._update_word_count)
+        self._track_text_edits()
         # Bind Ctrl+Z for undo
         self.text_area.bind('<Control-z>', lambda e: self.text_area.edit_undo())
         self.text_area.bind('<Control-y>', lambda e: self.text_area.edit_redo())
@@ -254,6 +343,33 @@ class TypingSimulatorGUI:
         self.error_rate_label = ttk.Label(error_rate_frame, width=8)
         self.error_rate_label.pack(pady=2)
 
+        # Keyboard layout used for adjacent-key errors
+        layout_frame = ttk.Frame(error_frame)
+        layout_frame.pack(fill="x", pady=5)
+        ttk.Label(layout_frame, text="Keyboard Layout:").pack(side="top", anchor="w")
+        self.layout_var = tk.StringVar(value=self.config["KEYBOARD_LAYOUT"])
+        layout_box = ttk.Combobox(
+            layout_frame,
+            textvariable=self.layout_var,
+            values=list(LAYOUTS),
+            state="readonly",
+            width=12
+        )
+        layout_box.pack(fill="x", pady=(5, 0))
+        layout_box.bind("<<ComboboxSelected>>", self._update_layout)
+
+        # Code mode for editors that auto-indent and auto-close brackets
+        editor_frame = ttk.LabelFrame(controls_container, text="Target Editor", padding=10)
+        editor_frame.pack(fill="x", pady=5)
+        self.code_mode_var = tk.BooleanVar(value=self.config["CODE_MODE"])
+        ToggleButton(
+            editor_frame,
+            text="Code Mode (auto-indent)",
+            variable=self.code_mode_var,
+            command=self._update_code_mode,
+            width=25
+        ).pack(fill="x", pady=2, padx=5)
+
         # Initialize slider values
         self._update_custom_speed(self.custom_speed_var.get())
         self._update_error_rate(self.error_rate_var.get())
@@ -262,6 +378,19 @@ class TypingSimulatorGUI:
         button_frame = ttk.Frame(controls_container)
         button_frame.pack(side="bottom", fill="x", pady=10)
 
+        # Live progress, fed from the engine's progress channel
+        progress_frame = ttk.LabelFrame(controls_container, text="Progress", padding=10)
+        progress_frame.pack(side="bottom", fill="x", pady=5)
+        self.progress_bar = ttk.Progressbar(
+            progress_frame,
+            orient="horizontal",
+            mode="determinate",
+            maximum=1
+        )
+        self.progress_bar.pack(fill="x", pady=2)
+        self.progress_label = ttk.Label(progress_frame, text="Idle", wraplength=180)
+        self.progress_label.pack(anchor="w", pady=2)
+
         self.start_button = ttk.Button(
             button_frame,
             text="Start (Ctrl+S)",
@@ -270,6 +399,13 @@ class TypingSimulatorGUI:
         )
         self.start_button.pack(fill="x", pady=2)
 
+        self.pause_button = ttk.Button(
+            button_frame,
+            text="Pause (Ctrl+P)",
+            command=self.toggle_pause
+        )
+        self.pause_button.pack(fill="x", pady=2)
+
         self.stop_button = ttk.Button(
             button_frame,
             text="Stop (Esc)",
@@ -280,8 +416,141 @@ class TypingSimulatorGUI:
         # Keyboard shortcuts
         self.text_area.bind("<Control-b>", lambda e: self._format_selection("bold"))
         self.text_area.bind("<Control-i>", lambda e: self._format_selection("italic"))
+        self.text_area.bind("<Control-V>", lambda e: self._toggle_paste_span() or "break")
         self.root.bind("<Control-s>", lambda e: self.start_typing())
         self.root.bind("<Escape>", lambda e: self.stop_typing())
+        # Text's own Ctrl+O (open line) and Ctrl+P (line up) bindings run
+        # before the root's, so these also go on the text area to stop them
+        for widget in (self.text_area, self.root):
+            widget.bind("<Control-o>", lambda e: self.open_file() or "break")
+            widget.bind("<Control-p>", lambda e: self.toggle_pause() or "break")
+
+    def _update_font_size(self, value):
+        """Resize the text area and the file preview"""
+        font = ("Segoe UI", int(float(value)))
+        self.text_area.configure(font=font)
+        self.preview_area.configure(font=font)
+
+    def _create_file_preview(self, parent):
+        """Read-only, paginated view of an open file; shown instead of the text area"""
+        self.file_frame = ttk.Frame(parent)
+        header = ttk.Frame(self.file_frame)
+        header.pack(fill="x", pady=(5, 0))
+        self.file_label = ttk.Label(header, text="", foreground="#8ab4f8")
+        self.file_label.pack(side="left")
+        ttk.Button(header, text="Close File", command=self.close_file).pack(side="right", padx=5)
+        ttk.Button(
+            header, text="Next", command=lambda: self._show_page(self._page + 1)
+        ).pack(side="right")
+        ttk.Button(
+            header, text="Previous", command=lambda: self._show_page(self._page - 1)
+        ).pack(side="right")
+        self.preview_area = tk.Text(
+            self.file_frame,
+            bg="#2d2d2d",
+            fg="#ffffff",
+            relief="flat",
+            padx=20,
+            pady=10,
+            font=("Segoe UI", self.font_size),
+            state="disabled"
+        )
+        self.preview_area.pack(fill="both", expand=True, pady=5)
+
+    def open_file(self):
+        """Type a file from disk instead of the text area"""
+        if self._busy():
+            return
+        path = filedialog.askopenfilename(
+            title="Open a text file to type",
+            filetypes=[("Text files", "*.txt *.md *.py"), ("All files", "*")]
+        )
+        if not path:
+            return
+        self._opening += 1
+        number = self._opening
+        self.word_count_label.config(text=f"Opening {os.path.basename(path)}...")
+
+        def index():
+            # Decoding and indexing a large file takes a while; not on the UI thread
+            try:
+                result = FileDocument(path)
+            except (OSError, UnicodeDecodeError) as e:
+                result = e
+            self._open_results.put((number, path, result))
+
+        threading.Thread(target=index, daemon=True).start()
+        self.root.after(PROGRESS_POLL_MS, self._apply_open)
+
+    def _apply_open(self):
+        """Switch to a file indexed in the background, or say why it failed"""
+        try:
+            number, path, result = self._open_results.get_nowait()
+        except queue.Empty:
+            self.root.after(PROGRESS_POLL_MS, self._apply_open)
+            return
+        opened = isinstance(result, FileDocument)
+        if number != self._opening or self._busy():
+            # Superseded by a later open, or a run started meanwhile
+            if opened:
+                result.close()
+            if number == self._opening:
+                self._show_source_label()
+            return
+        if not opened:
+            self._show_source_label()
+            messagebox.showerror("Open File", f"Cannot open {os.path.basename(path)}:\n{result}")
+            return
+        self.close_file()
+        self.document = result
+        self.text_area.pack_forget()
+        self.file_frame.pack(fill="both", expand=True, before=self.word_count_label)
+        self._show_source_label()
+        self._show_page(0)
+        self._estimate(result.identity, result)
+
+    def _show_source_label(self):
+        """Label the open file, or count the text area's words"""
+        if self.document is None:
+            self._update_word_count()
+        else:
+            self.word_count_label.config(
+                text=f"File: {os.path.basename(self.document.path)}  "
+                f"Characters: {len(self.document):,}"
+            )
+
+    def _busy(self):
+        """Whether a run is counting down or typing"""
+        return self.is_typing or bool(self.typing_thread and self.typing_thread.is_alive())
+
+    def close_file(self):
+        """Go back to typing the text area"""
+        if self.document is None or self._busy():
+            return
+        self.document.close()
+        self.document = None
+        self._estimate_source = None
+        self.estimate_label.configure(text="")
+        self.file_frame.pack_forget()
+        self.text_area.pack(fill="both", expand=True, pady=5, before=self.word_count_label)
+        self._update_word_count()
+
+    def _show_page(self, number):
+        """Show one page of the open file and where it sits in the document"""
+        document = self.document
+        if document is None or not 0 <= number < document.pages:
+            return
+        self._page = number
+        self.preview_area.configure(state="normal")
+        self.preview_area.delete("1.0", tk.END)
+        self.preview_area.insert("1.0", document.page(number))
+        self.preview_area.configure(state="disabled")
+        first = document.page_offsets[number]
+        last = document.page_offsets[min(number + 1, len(document.page_offsets) - 1)]
+        self.file_label.configure(
+            text=f"Page {number + 1:,} of {document.pages:,}  "
+            f"(characters {first:,}-{last:,} of {len(document):,})"
+        )
 
     def _create_speed_controls(self, parent):
         """Create speed control section with presets"""
@@ -390,16 +659,21 @@ class TypingSimulatorGUI:
                 self.custom_speed_var.set("80")
 
         self.config["WPM_MEAN"] = wpm
-        self.simulator.cpm_mean = wpm * 5
         self.config["SPEED_PRESET"] = preset
+        self._publish_config()
 
     def start_typing(self):
-        if self.typing_thread and self.typing_thread.is_alive():
+        if self._busy():
             return
 
-        text = self.text_area.get("1.0", tk.END).strip()
-        if not text:
-            return
+        if self.document is not None:
+            if not len(self.document):
+                return
+        else:
+            text = self.text_area.get("1.0", tk.END).strip()
+            if not text:
+                return
+            self._estimate(text, text)
 
         self.is_typing = True
         self.start_button.state(['disabled'])
@@ -413,15 +687,16 @@ class TypingSimulatorGUI:
             text="Prepare to type!\n"
             "1. Place your cursor where you want to type\n"
             "2. Timer will start in 3 seconds\n"
-            "3. Press ESC at any time to stop"
+            "3. Press ESC at any time to stop, Ctrl+P to pause"
         )
 
     def _countdown(self):
         """Display countdown timer with status"""
+        self._countdown_job = None
         if not self.instructions_shown:
             self._show_instructions()
             self.instructions_shown = True
-            self.root.after(1000, self._countdown)
+            self._countdown_job = self.root.after(1000, self._countdown)
             return
 
         if self.countdown_value > 0:
@@ -430,29 +705,135 @@ class TypingSimulatorGUI:
                 foreground="#8ab4f8" if self.countdown_value > 3 else "#ff7043"
             )
             self.countdown_value -= 1
-            self.root.after(1000, self._countdown)
+            self._countdown_job = self.root.after(1000, self._countdown)
         else:
             self.countdown_label.configure(text="GO!", foreground="#81c995")  # Google Green
             self.instructions_label.configure(text="")
             self.root.after(500, lambda: self.countdown_label.configure(text=""))
             self._start_typing_thread()
 
+    def _cancel_countdown(self):
+        """Drop the pending countdown step and clear its labels"""
+        self.root.after_cancel(self._countdown_job)
+        self._countdown_job = None
+        self.countdown_label.configure(text="")
+        self.instructions_label.configure(text="")
+        self._end_estimate()
+
     def _start_typing_thread(self):
         """Start the actual typing thread after countdown"""
-        text = self.text_area.get("1.0", tk.END).strip()
-        self.typing_thread = threading.Thread(target=self._typing_task, args=(text,))
+        if self.typing_thread and self.typing_thread.is_alive():
+            # Never two runs on one simulator; the stopped one is winding down
+            self.is_typing = False
+            self.start_button.state(["!disabled"])
+            return
+        if self.document is not None:
+            # Streamed from disk; the file is never loaded as a whole
+            source, total = self.document.chunks(), len(self.document)
+            identity, paste_spans = self.document.identity, ()
+        else:
+            raw = self.text_area.get("1.0", tk.END)
+            source = identity = raw.strip()
+            total = len(source)
+            paste_spans = self._paste_spans(len(raw) - len(raw.lstrip()))
+        estimate = None
+        if self._estimate_source is not None and self._estimate_source[0] == identity:
+            estimate = self._current_estimate()
+        # Continue a stopped run where it left off if its text is unchanged
+        checkpoint = self.simulator.checkpoint if identity == self._resume_source else None
+        self._run_source = identity
+        self._typing_error = None
+        self.simulator.progress.drain()  # Drop snapshots of earlier runs
+        self.progress_bar.configure(
+            maximum=max(total, 1),
+            value=checkpoint.position if checkpoint else 0
+        )
+        self.progress_label.configure(text="Resuming..." if checkpoint else "Starting...")
+        # Armed here on the UI thread, so a stop during the start delay counts
+        self.simulator.prepare()
+        self.typing_thread = threading.Thread(
+            target=self._typing_task,
+            args=(source, total, checkpoint, paste_spans, estimate)
+        )
         self.typing_thread.start()
+        self.root.after(PROGRESS_POLL_MS, self._poll_progress)
 
     def stop_typing(self):
         """Stop the typing simulation"""
         self.is_typing = False
-        self.simulator.stop_typing = True  # Add this flag to stop typing
+        if self._countdown_job is not None:
+            self._cancel_countdown()
+        self.simulator.stop()
+        self.pause_button.configure(text="Pause (Ctrl+P)")
         self.start_button.state(["!disabled"])
 
-    def _typing_task(self, text):
-        time.sleep(self.config["START_DELAY"])
-        self.simulator.type_text(text)
-        self.start_button.state(["!disabled"])
+    def toggle_pause(self):
+        """Pause the running simulation, or resume a paused one"""
+        if not (self.typing_thread and self.typing_thread.is_alive()):
+            return
+        if self.simulator.paused:
+            self.simulator.resume()
+            self.pause_button.configure(text="Pause (Ctrl+P)")
+        else:
+            self.simulator.pause()
+            self.pause_button.configure(text="Resume (Ctrl+P)")
+
+    def _typing_task(self, source, total, checkpoint=None, paste_spans=(), estimate=None):
+        """Runs on the typing thread; never touches Tk widgets"""
+        try:
+            self.simulator.type_stream(
+                source, total=total, checkpoint=checkpoint, paste_spans=paste_spans,
+                estimate=estimate, start_delay=self.config["START_DELAY"]
+            )
+        except Exception as e:
+            self._typing_error = str(e)
+            self.simulator.progress.publish(
+                self.simulator.progress_snapshot(finished=True)
+            )
+
+    def _poll_progress(self):
+        """Drain engine progress snapshots and update the panel"""
+        snapshots = self.simulator.progress.drain()
+        if snapshots:
+            latest = snapshots[-1]
+            if latest.total:
+                self.progress_bar.configure(maximum=latest.total, value=latest.done)
+            status = f"{latest.done:,}"
+            if latest.total:
+                status += f" / {latest.total:,} chars"
+            status += f"\n{latest.wpm:.0f} WPM, {latest.errors} errors"
+            if latest.paused:
+                status += " (paused)"
+            self.progress_label.configure(text=status)
+            if latest.eta is not None and not latest.finished:
+                self.estimate_label.configure(text=f"About {format_duration(latest.eta)} left")
+            if self.document is not None:
+                # Keep the preview on the page being typed
+                page = self.document.page_of(latest.done)
+                if page != self._page:
+                    self._show_page(page)
+            if latest.finished:
+                # The thread records its error only after publishing the
+                # final snapshot; it has nothing else left to do
+                self.typing_thread.join()
+                self.is_typing = False
+                self._end_estimate()
+                self.start_button.state(["!disabled"])
+                self.pause_button.configure(text="Pause (Ctrl+P)")
+                if self.simulator.checkpoint is not None:
+                    self._resume_source = self._run_source
+                    self.progress_label.configure(
+                        text=status + "\nStopped; Start continues from here"
+                    )
+                else:
+                    self._resume_source = None
+                if self._typing_error:
+                    self.progress_label.configure(text=f"Error: {self._typing_error}")
+                return
+        if self.typing_thread and self.typing_thread.is_alive() or snapshots:
+            self.root.after(PROGRESS_POLL_MS, self._poll_progress)
+        else:
+            self.start_button.state(["!disabled"])
 
     def _format_text(self, marker):
         """Apply formatting to selected text"""
@@ -477,6 +858,29 @@ class TypingSimulatorGUI:
         except tk.TclError:  # No selection
             pass
 
+    def _toggle_paste_span(self):
+        """Mark the selection to be pasted rather than typed, or unmark it"""
+        try:
+            first, last = self.text_area.index(tk.SEL_FIRST), self.text_area.index(tk.SEL_LAST)
+        except tk.TclError:  # No selection
+            return
+        if "paste" in self.text_area.tag_names(first):
+            self.text_area.tag_remove("paste", first, last)
+        else:
+            self.text_area.tag_add("paste", first, last)
+
+    def _paste_spans(self, skipped):
+        """Character offsets of the marked paste spans in the typed text"""
+        ranges = self.text_area.tag_ranges("paste")
+        offsets = [
+            (self.text_area.count("1.0", index, "chars") or (0,))[0] - skipped
+            for index in ranges
+        ]
+        return [
+            (max(start, 0), end) for start, end in zip(offsets[::2], offsets[1::2])
+            if end > 0
+        ]
+
     def _add_bullet(self):
         """Add bullet point at current line"""
         line_start = self.text_area.index("insert linestart")
@@ -503,6 +907,7 @@ class TypingSimulatorGUI:
             "ENABLE_ERRORS": self.error_var.get(),
             "KEEP_ERRORS": self.keep_errors_var.get()
         })
+        self._publish_config()
         try:
             with open(self.preferences_file, 'w') as f:
                 json.dump(self.preferences, f)
@@ -514,7 +919,7 @@ class TypingSimulatorGUI:
         rounded_value = round(float(value))
         self.wpm_var.set(rounded_value)
         self.config["WPM_MEAN"] = rounded_value
-        self.simulator.cpm_mean = rounded_value * 5
+        self._publish_config()
         self.wpm_label.configure(text=f"{rounded_value:,}" + (" WPM" if rounded_value < 1000 else ""))
 
     def _update_variation(self, value):
@@ -522,7 +927,7 @@ class TypingSimulatorGUI:
         rounded_value = round(float(value))
         self.std_var.set(rounded_value)
         self.config["WPM_STD"] = rounded_value
-        self.simulator.cpm_std = rounded_value * 5
+        self._publish_config()
         self.std_label.configure(text=f"±{rounded_value:,}")
 
     def _update_custom_speed(self, value):
@@ -532,7 +937,7 @@ class TypingSimulatorGUI:
             self.custom_speed_label.configure(text=f"{wpm:,} WPM")
             if self.speed_preset.get() == "Custom":
                 self.config["WPM_MEAN"] = wpm
-                self.simulator.cpm_mean = wpm * 5
+                self._publish_config()
         except ValueError as e:
             print(f"Error updating speed: {e}")
 
@@ -541,13 +946,217 @@ class TypingSimulatorGUI:
         rate = round(float(value))/100
         self.error_rate_var.set(rate * 100)
         self.config["ERROR_RATE"] = rate
-        self.simulator.base_error_rate = rate
+        self._publish_config()
         self.error_rate_label.configure(text=f"{rate*100:.1f}%")
 
+    def _update_layout(self, event=None):
+        """Switch the keyboard layout used for adjacent-key errors"""
+        self.config["KEYBOARD_LAYOUT"] = self.layout_var.get()
+        self._publish_config()
+
+    def _update_code_mode(self):
+        """Skip whitespace and closers the target editor inserts itself"""
+        self.config["CODE_MODE"] = self.code_mode_var.get()
+        self._publish_config()
+
+    def _publish_config(self):
+        """Hand the edited config to the engine as a new immutable snapshot.
+
+        A run in progress picks it up at its next key, so speed and error
+        changes apply mid-run without touching the typing thread's state.
+        """
+        if self._simulator is not None:
+            self._simulator.configure(self.config)
+        if self._estimate_source is not None:
+            self._estimate(*self._estimate_source)
+
+    def _estimate(self, identity, source):
+        """Show the estimated duration of typing a text or FileDocument.
+
+        The text is profiled once on a background thread; re-estimating it
+        for new settings after that is cheap enough for every slider move.
+        """
+        self._estimate_source = (identity, source)
+        key = (identity, tuple(self.config.get(name) for name in CODE_MODE_KEYS))
+        if self._profile is not None and self._profile[0] == key:
+            self._show_estimate()
+            return
+        if not self._running():
+            self.estimate_label.configure(text="Estimating duration...")
+        if self._profiling == key:
+            return
+        self._profiling = key
+        config = self.config.copy()
+
+        def profile():
+            from .estimate import profile_text
+
+            chunks = source.chunks() if isinstance(source, FileDocument) else source
+            try:
+                result = profile_text(chunks, config)
+            except Exception:  # Unreadable file; the run reports it
+                result = None
+            self._profile_results.put((key, result))
+
+        threading.Thread(target=profile, daemon=True).start()
+        self.root.after(PROGRESS_POLL_MS, self._apply_profile)
+
+    def _apply_profile(self):
+        """Take a finished background profile and show its estimate"""
+        try:
+            key, profile = self._profile_results.get_nowait()
+        except queue.Empty:
+            self.root.after(PROGRESS_POLL_MS, self._apply_profile)
+            return
+        if self._profiling == key:
+            self._profiling = None
+        if profile is None:
+            if not self._running():
+                self.estimate_label.configure(text="")
+        elif self._estimate_source is not None:
+            self._profile = (key, profile)
+            self._estimate(*self._estimate_source)
+
+    def _current_estimate(self):
+        """Estimate of the source being estimated with the current settings, if profiled"""
+        if self._estimate_source is None or self._profile is None:
+            return None
+        key, profile = self._profile
+        if key != (
+            self._estimate_source[0], tuple(self.config.get(name) for name in CODE_MODE_KEYS)
+        ):
+            return None
+        from .estimate import estimate_run
+
+        return estimate_run(profile, compile_settings(self.config))
+
+    def _show_estimate(self):
+        """Label the upfront estimate; a running typing thread shows its ETA instead"""
+        estimate = self._current_estimate()
+        if estimate is None or self._running():
+            return
+        self.estimate_label.configure(
+            text=f"Estimated {format_duration(estimate.seconds)} "
+            f"for {estimate.keystrokes:,} keystrokes"
+        )
+
+    def _running(self):
+        """Whether a run is typing (rather than counting down or finished)"""
+        return self.is_typing and self.typing_thread is not None and self.typing_thread.is_alive()
+
+    def _end_estimate(self):
+        """After a run, keep estimating only an open file"""
+        if self.document is None:
+            self._estimate_source = None
+            self.estimate_label.configure(text="")
+        else:
+            self._show_estimate()
+
+    def _track_text_edits(self):
+        """Route the text widget's Tcl command through _text_proxy.
+
+        Every insert and delete, whether typed, pasted or done by undo,
+        passes through the proxy, so word and character counts can be
+        updated from just the edited span.
+        """
+        widget = self.text_area
+        self._text_command = widget._w + "_orig"
+        widget.tk.call("rename", widget._w, self._text_command)
+        widget.tk.createcommand(widget._w, self._text_proxy)
+
+    def _text_proxy(self, *args):
+        """Forward a text widget command, tracking the statistics it changes"""
+        call = self.text_area.tk.call
+        command = self._text_command
+        operation = args[0] if args else ""
+        if operation == "insert" and len(args) >= 3:
+            index = call(command, "index", args[1])
+            if call(command, "compare", index, "==", "end"):
+                index = call(command, "index", "end-1c")
+            left = call(command, "get", f"{index}-1c", index)
+            right = call(command, "get", index, f"{index}+1c")
+            result = call(command, *args)
+            self._count_insert(left, "".join(args[2::2]), right)
+            return result
+        if operation == "delete" and 2 <= len(args) <= 3:
+            first = call(command, "index", args[1])
+            last = call(command, "index", args[2] if len(args) == 3 else f"{first}+1c")
+            if call(command, "compare", last, ">", "end-1c"):
+                last = call(command, "index", "end-1c")
+            if not call(command, "compare", first, "<", last):
+                return call(command, *args)
+            deleted = call(command, "get", first, last)
+            left = call(command, "get", f"{first}-1c", first)
+            right = call(command, "get", last, f"{last}+1c")
+            result = call(command, *args)
+            self.text_stats.add_chars(-len(deleted))
+            self.text_stats.add_words(delete_delta(left, deleted, right))
+            self._schedule_word_count_update()
+            return result
+        # Undo and redo replay their edits as insert and delete commands
+        # through this proxy, so only the rarer replace and multi-range
+        # delete need a full recount; one is queued per burst of them
+        result = call(command, *args)
+        if operation in ("replace", "delete") and self._recount_job is None:
+            self._recount_job = self.root.after_idle(self._recount_words)
+        return result
+
+    def _count_insert(self, left, inserted, right):
+        """Account for inserted text, counting large pastes in the background"""
+        stats = self.text_stats
+        stats.add_chars(len(inserted))
+        if len(inserted) < BACKGROUND_COUNT_CHARS:
+            stats.add_words(insert_delta(left, inserted, right))
+        else:
+            generation = stats.generation
+            self._count_in_background(
+                lambda: ("delta", generation, insert_delta(left, inserted, right))
+            )
+        self._schedule_word_count_update()
+
+    def _recount_words(self):
+        """Recount the whole document from a snapshot on a background thread"""
+        self._recount_job = None
+        text = self.text_area.get("1.0", "end-1c")
+        generation = self.text_stats.start_recount()
+        self._count_in_background(
+            lambda: ("full", generation, count_words(text), len(text))
+        )
+        self._schedule_word_count_update()
+
+    def _count_in_background(self, job):
+        """Run a counting job off the UI thread; its result is queued"""
+        self._stats_pending += 1
+        threading.Thread(
+            target=lambda: self._stats_results.put(job()), daemon=True
+        ).start()
+
+    def _schedule_word_count_update(self):
+        """Debounce label refreshes so bursts of edits update it once"""
+        if self._word_count_job is None:
+            self._word_count_job = self.root.after(
+                WORD_COUNT_DEBOUNCE_MS, self._update_word_count
+            )
+
     def _update_word_count(self, event=None):
-        text = self.text_area.get("1.0", tk.END)
-        words = len([w for w in text.split() if w.strip()])
-        self.word_count_label.config(text=f"Words: {words}")
+        """Apply background count results and refresh the label"""
+        self._word_count_job = None
+        stats = self.text_stats
+        while True:
+            try:
+                result = self._stats_results.get_nowait()
+            except queue.Empty:
+                break
+            self._stats_pending -= 1
+            if result[0] == "delta":
+                stats.add_words(result[2], result[1])
+            else:
+                stats.finish_recount(*result[1:])
+        if self._stats_pending:
+            self._schedule_word_count_update()  # Results still on their way
+        self.word_count_label.config(
+            text=f"Words: {stats.words:,}  Characters: {stats.chars:,}"
+        )
 
     def run(self):
         self.root.mainloop()
@@ -1,64 +1,127 @@
-"""Keyboard layout and related functions."""
-
-QWERTY_LAYOUT = {
-    # Top row
-    "q": ["w", "a", "1", "2"],
-    "w": ["q", "e", "a", "s", "2", "3"],
-    "e": ["w", "r", "s", "d", "3", "4"],
-    "r": ["e", "t", "d", "f", "4", "5"],
-    "t": ["r", "y", "f", "g", "5", "6"],
-    "y": ["t", "u", "g", "h", "6", "7"],
-    "u": ["y", "i", "h", "j", "7", "8"],
-    "i": ["u", "o", "j", "k", "8", "9"],
-    "o": ["i", "p", "k", "l", "9", "0"],
-    "p": ["o", "[", "l", ";", "0", "-"],
-    # Middle row
-    "a": ["q", "w", "s", "z"],
-    "s": ["w", "e", "a", "d", "z", "x"],
-    "d": ["e", "r", "s", "f", "x", "c"],
-    "f": ["r", "t", "d", "g", "c", "v"],
-    "g": ["t", "y", "f", "h", "v", "b"],
-    "h": ["y", "u", "g", "j", "b", "n"],
-    "j": ["u", "i", "h", "k", "n", "m"],
-    "k": ["i", "o", "j", "l", "m", ","],
-    "l": ["o", "p", "k", ";", ",", "."],
-    # Bottom row
-    "z": ["a", "s", "x"],
-    "x": ["s", "d", "z", "c"],
-    "c": ["d", "f", "x", "v"],
-    "v": ["f", "g", "c", "b"],
-    "b": ["g", "h", "v", "n"],
-    "n": ["h", "j", "b", "m"],
-    "m": ["j", "k", "n", ","],
-    # Numbers and symbols
-    "1": ["q", "2"],
-    "2": ["1", "3", "q", "w"],
-    "3": ["2", "4", "w", "e"],
-    "4": ["3", "5", "e", "r"],
-    "5": ["4", "6", "r", "t"],
-    "6": ["5", "7", "t", "y"],
-    "7": ["6", "8", "y", "u"],
-    "8": ["7", "9", "u", "i"],
-    "9": ["8", "0", "i", "o"],
-    "0": ["9", "-", "o", "p"],
-    ",": ["m", ".", "k", "l"],
-    ".": [",", "/", "l"],
-    "/": [".", "l"],
-    ";": ["l", "p"],
-    "'": [";", "["],
-    "[": ["p", "]"],
-    "]": ["[", "\\"],
-    "\\": ["]"],
-    "-": ["0", "="],
-    "=": ["-"],
-}
-
-
-def get_adjacent_key(char):
-    """Get a random adjacent key for the given character."""
-    import random
-
-    char = char.lower()
-    if char in QWERTY_LAYOUT:
-        return random.choice(QWERTY_LAYOUT[char])
-    return char
+"""Keyboard layout and related functions.
+
+Layouts are described by key geometry (see layouts.py): rows of keys, each
+written as the unshifted character followed by its shifted one, plus the
+horizontal offset of each row in key widths. They are compiled once into
+flat neighbour tables so adjacent-key errors can be drawn in bulk.
+"""
+
+from bisect import bisect_right
+from functools import lru_cache
+import numpy as np
+from .layouts import LAYOUTS
+
+NEIGHBOUR_RADIUS = 1.3  # Max centre distance (in key widths) for a slip
+
+_rng = np.random.default_rng()  # Draws for callers that bring no generator
+
+
+def layout_keys(name):
+    """Return ``(char, shifted_char, x, y)`` for every key of a layout."""
+    layout = LAYOUTS[name]
+    keys = []
+    for y, (row, offset) in enumerate(zip(layout["rows"], layout["offsets"])):
+        for column, token in enumerate(row.split()):
+            keys.append((token[0], token[1:], offset + column, y))
+    return keys
+
+
+class NeighbourIndex:
+    """Flat, distance-weighted neighbour table for one layout.
+
+    Neighbours of every typable character are stored back to back in
+    ``neighbours``; ``cumulative`` holds each character's normalised
+    cumulative weights shifted by its segment number, so one searchsorted
+    call samples neighbours for a whole array of characters.
+    """
+
+    def __init__(self, name):
+        keys = layout_keys(name)
+        positions = np.array([(x, y) for _, _, x, y in keys], dtype=float)
+        table = {}
+        for i, (char, shifted, _, _) in enumerate(keys):
+            distance = np.hypot(*(positions - positions[i]).T)
+            near = np.flatnonzero((distance > 0) & (distance <= NEIGHBOUR_RADIUS))
+            weights = 1 / distance[near] ** 2
+            # Holding shift while slipping produces the neighbour's shifted symbol
+            table.setdefault(char, ([keys[j][0] for j in near], weights))
+            if shifted:
+                table.setdefault(shifted, ([keys[j][1] or keys[j][0] for j in near], weights))
+
+        chars = sorted(table)
+        self.chars = np.array([ord(c) for c in chars], dtype=np.uint32)
+        neighbours, chances, cumulative, counts = [], [], [], []
+        for segment, char in enumerate(chars):
+            near, weights = table[char]
+            neighbours.extend(near)
+            chances.extend(weights / weights.sum())
+            cumulative.extend(segment + np.cumsum(weights) / weights.sum())
+            counts.append(len(near))
+        self.neighbours = np.array(neighbours, dtype="<U1")
+        self.chances = np.array(chances)  # Chance of each neighbour being drawn
+        self.cumulative = np.array(cumulative)
+        self.offsets = np.concatenate(([0], np.cumsum(counts)))
+        # Plain-Python view of the same table for one-off lookups
+        self._lookup = {
+            char: (neighbours[start:end], (self.cumulative[start:end] - segment).tolist())
+            for segment, (char, start, end) in enumerate(
+                zip(chars, self.offsets[:-1], self.offsets[1:])
+            )
+        }
+
+    def sample(self, keys, rng):
+        """Draw one adjacent key per character; "" where there is none."""
+        keys = np.asarray(keys, dtype="<U1")
+        codes = keys.view(np.uint32)
+        segment = np.minimum(np.searchsorted(self.chars, codes), len(self.chars) - 1)
+        known = self.chars[segment] == codes
+        result = np.full(keys.shape, "", dtype="<U1")
+        segment = segment[known]
+        draw = np.searchsorted(
+            self.cumulative, segment + rng.random(segment.size), side="right"
+        )
+        # Guard against rounding at the top of a segment
+        draw = np.minimum(draw, self.offsets[segment + 1] - 1)
+        result[known] = self.neighbours[draw]
+        return result
+
+    def slip_chance(self, keys, exclude=()):
+        """Chance that a slip on each key lands on a neighbour not in ``exclude``.
+
+        0 for characters that are not on the layout.
+        """
+        keys = np.asarray(keys, dtype="<U1")
+        codes = keys.view(np.uint32)
+        segment = np.minimum(np.searchsorted(self.chars, codes), len(self.chars) - 1)
+        known = self.chars[segment] == codes
+        chances = np.where(np.isin(self.neighbours, exclude), 0.0, self.chances)
+        # Every character on the layout has at least one neighbour
+        totals = np.add.reduceat(chances, self.offsets[:-1])
+        return np.where(known, totals[segment], 0.0)
+
+    def sample_one(self, char, rng):
+        """Draw one adjacent key for a single character; "" if there is none."""
+        entry = self._lookup.get(char)
+        if entry is None:
+            return ""
+        near, cumulative = entry
+        return near[min(bisect_right(cumulative, rng.random()), len(near) - 1)]
+
+
+@lru_cache(maxsize=None)
+def get_layout_index(name="qwerty"):
+    """Compile (once) and return the neighbour index of a layout."""
+    if name not in LAYOUTS:
+        raise ValueError(f"Unknown keyboard layout: {name}")
+    return NeighbourIndex(name)
+
+
+def get_adjacent_key(char, layout="qwerty", rng=None):
+    """Get a random adjacent key for the given character.
+
+    Returns the character itself when it is not on the layout. Without an
+    ``rng``, draws come from a shared module-level generator.
+    """
+    if rng is None:
+        rng = _rng
+    return get_layout_index(layout).sample_one(char, rng) or char
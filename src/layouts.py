@@ -0,0 +1,58 @@
+"""Keyboard layout geometry.
+
+Plain data with no heavy imports, so layout names are available to the GUI
+and CLI before the planner (and NumPy) are loaded. Each row is written as
+the unshifted character of every key followed by its shifted one; offsets
+are the horizontal start of each row in key widths.
+"""
+
+ANSI_OFFSETS = (0.0, 1.5, 1.75, 2.25)
+ISO_OFFSETS = (0.0, 1.5, 1.75, 1.25)  # Extra key left of the bottom row
+
+LAYOUTS = {
+    "qwerty": {
+        "rows": (
+            "`~ 1! 2@ 3# 4$ 5% 6^ 7& 8* 9( 0) -_ =+",
+            "qQ wW eE rR tT yY uU iI oO pP [{ ]} \\|",
+            "aA sS dD fF gG hH jJ kK lL ;: '\"",
+            "zZ xX cC vV bB nN mM ,< .> /?",
+        ),
+        "offsets": ANSI_OFFSETS,
+    },
+    "azerty": {
+        "rows": (
+            "² &1 é2 \"3 '4 (5 -6 è7 _8 ç9 à0 )° =+",
+            "aA zZ eE rR tT yY uU iI oO pP ^¨ $£",
+            "qQ sS dD fF gG hH jJ kK lL mM ù% *µ",
+            "<> wW xX cC vV bB nN ,? ;. :/ !§",
+        ),
+        "offsets": ISO_OFFSETS,
+    },
+    "qwertz": {
+        "rows": (
+            "^° 1! 2\" 3§ 4$ 5% 6& 7/ 8( 9) 0= ß? ´`",
+            "qQ wW eE rR tT zZ uU iI oO pP üÜ +*",
+            "aA sS dD fF gG hH jJ kK lL öÖ äÄ #'",
+            "<> yY xX cC vV bB nN mM ,; .: -_",
+        ),
+        "offsets": ISO_OFFSETS,
+    },
+    "dvorak": {
+        "rows": (
+            "`~ 1! 2@ 3# 4$ 5% 6^ 7& 8* 9( 0) [{ ]}",
+            "'\" ,< .> pP yY fF gG cC rR lL /? =+ \\|",
+            "aA oO eE uU iI dD hH tT nN sS -_",
+            ";: qQ jJ kK xX bB mM wW vV zZ",
+        ),
+        "offsets": ANSI_OFFSETS,
+    },
+    "colemak": {
+        "rows": (
+            "`~ 1! 2@ 3# 4$ 5% 6^ 7& 8* 9( 0) -_ =+",
+            "qQ wW fF pP gG jJ lL uU yY ;: [{ ]} \\|",
+            "aA rR sS tT dD hH nN eE iI oO '\"",
+            "zZ xX cC vV bB kK mM ,< .> /?",
+        ),
+        "offsets": ANSI_OFFSETS,
+    },
+}
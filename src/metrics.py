@@ -0,0 +1,163 @@
+"""Realised typing metrics with constant-time updates.
+
+Everything is kept in fixed-bucket histograms and counters, so recording a
+key costs the same whether a run is ten keys or ten million long.
+"""
+
+import math
+from collections import deque
+from .planner import PAUSE_NAMES
+from .trace import TRACE_CORRECTION, TRACE_ERROR
+
+
+class Histogram:
+    """Log-spaced histogram with O(1) inserts.
+
+    Values below ``low`` land in the first bucket and values above ``high``
+    in the last; bucket edges grow geometrically in between.
+    """
+
+    def __init__(self, low, high, buckets=64):
+        self.low = low
+        self.high = high
+        self.buckets = buckets
+        self._scale = buckets / math.log(high / low)
+        self.counts = [0] * buckets
+        self.count = 0
+        self.total = 0.0
+
+    def add(self, value):
+        """Insert one value."""
+        if value > self.low:
+            index = min(int(math.log(value / self.low) * self._scale), self.buckets - 1)
+        else:
+            index = 0
+        self.counts[index] += 1
+        self.count += 1
+        self.total += value
+
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def edges(self):
+        """Lower edge of every bucket."""
+        return [self.low * math.exp(i / self._scale) for i in range(self.buckets)]
+
+    def percentile(self, q):
+        """Approximate percentile (0-100) from bucket midpoints."""
+        if not self.count:
+            return 0.0
+        rank = q / 100 * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= rank:
+                return self.low * math.exp((index + 0.5) / self._scale)
+        return self.high
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "mean": self.mean(),
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+        }
+
+
+class TypingMetrics:
+    """Realised intervals, rolling speed, errors and pause time of a run."""
+
+    def __init__(self, rolling_keys=50):
+        self.rolling_keys = rolling_keys  # Keys per rolling WPM window
+        self.reset()
+
+    def reset(self, now=None):
+        """Clear all measurements, optionally anchoring the run start time."""
+        self.start_time = now
+        self.last_time = now
+        self.keys = 0
+        self.errors = 0
+        self.corrections = 0  # Backspaces correcting a slip
+        self.edits = 0  # Backspaces and deletes removing editor insertions
+        self.planned_total = 0.0  # ms
+        self.actual_total = 0.0  # ms
+        self.intervals = Histogram(0.1, 10000)  # Realised gaps (ms)
+        self.planned = Histogram(0.1, 10000)  # Planned gaps (ms)
+        self.wpm = Histogram(1, 10000)  # Rolling WPM samples
+        self.pause_time = {name: 0.0 for name in PAUSE_NAMES.values()}  # ms
+        self.pauses = {name: Histogram(1, 10000, 32) for name in PAUSE_NAMES.values()}
+        self._recent = deque(maxlen=self.rolling_keys)
+
+    def record_key(self, now, key, planned, error=0):
+        """Record one emitted key; mirrors TraceRecorder.record."""
+        if self.start_time is None:
+            self.start_time = now
+        if self.last_time is not None:
+            actual = (now - self.last_time) * 1000
+            self.intervals.add(actual)
+            self.actual_total += actual
+        self.last_time = now
+        self.planned.add(planned)
+        self.planned_total += planned
+        if error == TRACE_ERROR:
+            self.errors += 1
+        elif key == "\b" and error == TRACE_CORRECTION:
+            self.corrections += 1
+        elif key in ("\b", "\x7f"):
+            self.edits += 1  # Only ever clean in code mode
+        else:
+            self.keys += 1
+        recent = self._recent
+        recent.append(now)
+        if len(recent) == recent.maxlen:
+            self.wpm.add(self.rolling_wpm())
+
+    def shift(self, seconds):
+        """Move every timestamp forward, leaving a suspended stretch out of the run."""
+        if self.start_time is not None:
+            self.start_time += seconds
+        if self.last_time is not None:
+            self.last_time += seconds
+        self._recent = deque((t + seconds for t in self._recent), maxlen=self.rolling_keys)
+
+    def record_pause(self, kind, duration):
+        """Record a human pause of a PAUSE_* kind (ms)."""
+        name = PAUSE_NAMES.get(kind)
+        if name is not None:
+            self.pause_time[name] += duration
+            self.pauses[name].add(duration)
+
+    def rolling_wpm(self):
+        """Achieved WPM over the most recent keys."""
+        recent = self._recent
+        if len(recent) < 2 or recent[-1] <= recent[0]:
+            return 0.0
+        return (len(recent) - 1) / (recent[-1] - recent[0]) * 60 / 5
+
+    def achieved_wpm(self):
+        """Achieved WPM over the whole run so far, pauses included."""
+        if self.start_time is None or self.last_time is None or self.last_time <= self.start_time:
+            return 0.0
+        return self.keys / (self.last_time - self.start_time) * 60 / 5
+
+    def timing_ratio(self):
+        """Realised over planned time; above 1 means running slow."""
+        return self.actual_total / self.planned_total if self.planned_total else 1.0
+
+    def snapshot(self):
+        """Summarise every metric as a plain dict."""
+        return {
+            "keys": self.keys,
+            "errors": self.errors,
+            "corrections": self.corrections,
+            "edits": self.edits,
+            "achieved_wpm": self.achieved_wpm(),
+            "rolling_wpm": self.rolling_wpm(),
+            "timing_ratio": self.timing_ratio(),
+            "intervals_ms": self.intervals.to_dict(),
+            "planned_ms": self.planned.to_dict(),
+            "wpm": self.wpm.to_dict(),
+            "pause_time_ms": dict(self.pause_time),
+            "pauses_ms": {name: h.to_dict() for name, h in self.pauses.items()},
+        }
@@ -0,0 +1,217 @@
+"""Two-tier cache of compiled keystroke plans.
+
+Plans are cached per planning window. A window's plan is fully determined
+by its text and surrounding context, the planner's config fields, the
+speed and error settings and the generator (and, in code mode, editor
+model) state it was planned from, so those make up the key. Each entry also
+stores that state after planning, which a hit restores so the following
+windows come out exactly as if the window had been compiled again.
+
+The memory tier is an LRU bounded in bytes; the disk tier keeps one file
+per entry under the user's cache directory (a JSON header line followed by
+the raw plan records) and evicts the least recently used files once it
+grows past its byte budget. Files are written and evicted by a background
+thread, so storing a plan never touches the disk on the typing thread; the
+tier is off by default because entries of runs with a fresh random seed are
+only ever read back by replays and resumes.
+"""
+
+import hashlib
+import json
+import os
+import queue
+import sys
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+import numpy as np
+from .config import PLAN_CONFIG_KEYS
+from .planner import PLAN_DTYPE
+
+CACHE_VERSION = 3  # Bump when the planner's output changes for the same inputs
+DISK_MIN_KEYS = 1024  # Smaller plans are quicker to recompile than to read back
+DISK_EVICT_SHARE = 0.75  # Eviction frees the disk tier down to this share of its budget
+
+
+def default_cache_dir():
+    """Per-user cache directory for plan files."""
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~\\AppData\\Local")
+    elif sys.platform == "darwin":
+        base = os.path.expanduser("~/Library/Caches")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(base, "humantyping", "plans")
+
+
+def plan_key(text, before, after, config, cpm_mean, cpm_std, error_rate, rng, editor=None):
+    """Hash everything a window's plan depends on into a hex key."""
+    settings = {key: config.get(key) for key in PLAN_CONFIG_KEYS}
+    model = config.get("TIMING_MODEL_FILE")
+    if model is not None:
+        stat = os.stat(model)
+        settings["TIMING_MODEL_STAT"] = (stat.st_size, stat.st_mtime_ns)
+    header = json.dumps(
+        [CACHE_VERSION, settings, cpm_mean, cpm_std, error_rate, rng.bit_generator.state,
+         editor.state() if editor is not None else None, before, after],
+        sort_keys=True,
+    )
+    digest = hashlib.blake2b(header.encode(), digest_size=20)
+    digest.update(text.encode("utf-8", "surrogatepass"))
+    return digest.hexdigest()
+
+
+class PlanCache:
+    """LRU plan cache in memory with an optional size-bounded disk tier.
+
+    Cached plans are shared between callers and therefore read-only.
+    """
+
+    def __init__(self, memory_bytes=64 * 2**20, disk_bytes=0, directory=None):
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes  # 0 disables the disk tier
+        self.directory = directory or default_cache_dir()
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (plan, state)
+        self._size = 0
+        self._lock = threading.Lock()
+        self._writes = queue.Queue()  # (key, plan, state) for the writer thread
+        self._writer = None
+        self._disk_size = None  # Bytes in the disk tier, counted by the writer
+
+    def get(self, key):
+        """Return ``(plan, state)`` for a key, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+        entry = self._load(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._remember(key, *entry)
+        return entry
+
+    def put(self, key, plan, state):
+        """Store a plan and the JSON-friendly planner state after planning it."""
+        plan.flags.writeable = False
+        self._remember(key, plan, state)
+        if self.disk_bytes and plan.size >= DISK_MIN_KEYS:
+            with self._lock:
+                if self._writer is None:
+                    self._writer = threading.Thread(
+                        target=self._write_loop, name="plan-cache-writer", daemon=True
+                    )
+                    self._writer.start()
+            self._writes.put((key, plan, state))
+
+    def flush(self):
+        """Wait until every stored plan has been written to disk."""
+        self._writes.join()
+
+    def clear(self):
+        """Drop the memory tier; the disk tier is left alone."""
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def _remember(self, key, plan, state):
+        if plan.nbytes > self.memory_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = (plan, state)
+            self._size += plan.nbytes
+            while self._size > self.memory_bytes:
+                evicted, _ = self._entries.popitem(last=False)[1]
+                self._size -= evicted.nbytes
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + ".plan")
+
+    def _load(self, key):
+        if not self.disk_bytes:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                state = json.loads(f.readline())
+                plan = np.frombuffer(f.read(), dtype=PLAN_DTYPE)
+            os.utime(path)  # Mark as recently used for eviction
+        except (OSError, ValueError):
+            return None  # Missing, or a truncated or foreign file
+        return plan, state
+
+    def _write_loop(self):
+        """Writer thread: store queued entries one at a time."""
+        while True:
+            entry = self._writes.get()
+            try:
+                self._store(*entry)
+            finally:
+                self._writes.task_done()
+
+    def _store(self, key, plan, state):
+        """Write an entry atomically, then evict old files over the budget."""
+        path = self._path(key)
+        temporary = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            if self._disk_size is None:
+                self._evict()  # Counts what earlier runs left
+            header = json.dumps(state).encode() + b"\n"
+            with open(temporary, "wb") as f:
+                f.write(header)
+                f.write(plan.tobytes())
+            os.replace(temporary, path)
+            # A rewritten key is counted twice; that only evicts a bit early
+            self._disk_size += len(header) + plan.nbytes
+            if self._disk_size > self.disk_bytes:
+                self._evict()
+        except OSError:
+            # The disk tier is best effort; planning works without it
+            try:
+                os.remove(temporary)
+            except OSError:
+                pass
+
+    def _evict(self):
+        """Count the disk tier and, when over budget, drop its oldest files."""
+        files = []
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.name.endswith(".plan"):
+                    stat = entry.stat()
+                    files.append((stat.st_mtime_ns, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in files)
+        if total > self.disk_bytes:
+            for _, size, path in sorted(files):
+                if total <= self.disk_bytes * DISK_EVICT_SHARE:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                total -= size
+        self._disk_size = total
+
+
+@lru_cache(maxsize=None)
+def _shared_cache(memory_mb, disk_mb, directory):
+    return PlanCache(int(memory_mb * 2**20), int(disk_mb * 2**20), directory)
+
+
+def get_plan_cache(config):
+    """Return the process-wide plan cache for a config, or None if disabled."""
+    if not config.get("PLAN_CACHE", True):
+        return None
+    return _shared_cache(
+        config.get("PLAN_CACHE_MEMORY_MB", 64),
+        config.get("PLAN_CACHE_DISK_MB", 0),
+        config.get("PLAN_CACHE_DIR"),
+    )
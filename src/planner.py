@@ -0,0 +1,258 @@
+"""Keystroke plan compiler.
+
+Turns a whole text plus config into an array-backed plan in one batched
+NumPy pass, so the typing loop only has to walk the precomputed events.
+"""
+
+import numpy as np
+from .utils import generate_delays
+from .features import text_features
+from .keyboard_layout import get_layout_index
+from .timing_model import get_timing_model
+from .code_mode import PAIR_CHARS
+
+# Error kinds stored in the plan
+ERROR_NONE = 0
+ERROR_CODES = {"adjacent": 1, "transpose": 2, "omit": 3}
+
+# Pause categories
+PAUSE_NONE = 0
+PAUSE_THINKING = 1
+PAUSE_HESITATION = 2
+PAUSE_HAND_MOVE = 3
+PAUSE_NAMES = {
+    PAUSE_THINKING: "thinking",
+    PAUSE_HESITATION: "hesitation",
+    PAUSE_HAND_MOVE: "hand_move",
+}
+
+# Human pause ranges (milliseconds)
+THINKING_PAUSE = (600, 1500)
+HESITATION_PAUSE = (200, 500)
+HAND_MOVE_PAUSE = (80, 180)
+HESITATION_CHANCE = 0.08
+CORRECTION_HESITATION = (120, 350)  # Hesitation before a correction
+MIN_KEY_SHARE = 0.5  # Share of a plan's time budget always left to the keys
+PAUSE_RANGES = {
+    PAUSE_THINKING: THINKING_PAUSE,
+    PAUSE_HESITATION: HESITATION_PAUSE,
+    PAUSE_HAND_MOVE: HAND_MOVE_PAUSE,
+}
+
+# Pause rules as (PAUSE_* kind, text feature, chance), grouped by kind with
+# the highest priority kind first. A key gets the pause of the first kind
+# with a rule that fires for it; see features.FEATURE_DTYPE for features.
+PAUSE_RULES = (
+    (PAUSE_THINKING, "sentence_end", 1.0),  # Thinking moment after a sentence
+    (PAUSE_HESITATION, "comma", 1.0),
+    (PAUSE_HESITATION, "long_word", HESITATION_CHANCE),  # Occasionally
+    (PAUSE_HAND_MOVE, "transition", 1.0),  # Between letters and non-letters
+)
+
+# Keys an editor may insert or consume by itself, which must not be slipped
+# onto or off in code mode
+CODE_FRAGILE_KEYS = list(" \t\n" + PAIR_CHARS)
+
+PLAN_DTYPE = np.dtype([
+    ("key", "<U1"),  # Character to type
+    ("delay", "<f4"),  # Planned inter-key delay (ms)
+    ("pause", "<f4"),  # Human pause before the key (ms)
+    ("pause_kind", "u1"),  # PAUSE_* category of that pause
+    ("error", "u1"),  # ERROR_* kind, ERROR_NONE if typed cleanly
+    ("wrong", "<U1"),  # Character typed instead ("" if none)
+    ("correct", "?"),  # Whether the error gets backspaced and fixed
+    ("hesitation", "<f4"),  # Pause before the correction (ms)
+    ("backspace", "<f4"),  # Delay after the backspace (ms)
+    ("auto", "?"),  # Inserted by the editor in code mode; not typed
+    ("erase", "<i2"),  # Keys to remove first: backspaces if > 0, deletes if < 0
+])
+
+
+def text_to_keys(text):
+    """View a string as a NumPy array of single characters."""
+    return np.frombuffer(text.encode("utf-32-le"), dtype="<U1")
+
+
+def speed_error_rate(error_rate, cpm, cpm_mean):
+    """Error rate of keys typed at ``cpm`` in a run averaging ``cpm_mean``.
+
+    Faster keys slip more: the rate rises by half their relative speed-up.
+    """
+    return error_rate * (1 + (cpm / cpm_mean - 1) * 0.5)
+
+
+def compile_plan(
+    text, config, cpm_mean, cpm_std, error_rate, rng, before="", after="", editor=None
+):
+    """Compile text into a structured keystroke plan.
+
+    Every random draw comes from ``rng`` (a numpy Generator), so the same
+    seed, config and text always give the same plan. ``before`` and ``after``
+    are the characters surrounding ``text`` when it is one window of a longer
+    stream; they only provide context for pauses and transposition errors and
+    are not part of the plan.
+
+    ``editor`` is the code_mode.EditorModel of a code mode run. It is
+    advanced past ``text``, and the plan leaves out what it reports the
+    editor inserts by itself.
+
+    With ``KEEP_TARGET_WPM`` on, the plan is rescaled last so its pauses
+    and corrections fit in the time its keys take at ``cpm_mean``.
+    """
+    n = len(text)
+    plan = np.zeros(n, dtype=PLAN_DTYPE)
+    if n == 0:
+        return plan
+    before = before[-5:]
+    context = text_to_keys(before + text)
+    keys = context[len(before):]
+    plan["key"] = keys
+
+    # Planned delays, shaped by each key's digraph, and the speed-dependent
+    # error rate
+    delays = generate_delays(cpm_mean, cpm_std, config["MIN_CPM"], n, rng)
+    if config.get("DIGRAPH_TIMING", True):
+        model = get_timing_model(
+            config.get("KEYBOARD_LAYOUT", "qwerty"), config.get("TIMING_MODEL_FILE")
+        )
+        if before:
+            multipliers = model.sample(context[len(before) - 1:], rng)
+        else:
+            multipliers = model.sample(keys, rng, start=0)
+        delays = np.maximum(delays * multipliers, 0.001)
+    plan["delay"] = delays
+    dynamic_error_rate = speed_error_rate(error_rate, 60000 / delays, cpm_mean)
+
+    plan["pause"], plan["pause_kind"] = _plan_pauses(context, rng, len(before))
+
+    editable = None
+    if editor is not None:
+        auto, erase = editor.process(text)
+        plan["auto"] = auto
+        plan["erase"] = erase
+        plan["delay"][auto] = 0
+        plan["delay"] += np.abs(erase) * np.float32(config.get("BACKSPACE_DELAY", 100))
+        _move_pauses(plan)
+        # Slips on whitespace or brackets would desync the editor's own
+        # insertions from the model, so only other keys get errors
+        editable = ~(auto | (erase != 0) | np.isin(keys, CODE_FRAGILE_KEYS))
+
+    if config.get("ENABLE_ERRORS", True) and config["ERROR_TYPES"]:
+        _plan_errors(plan, config, dynamic_error_rate, rng, after, editable)
+    if config.get("KEEP_TARGET_WPM", True):
+        _fit_to_speed(plan, cpm_mean)
+    return plan
+
+
+def _plan_errors(plan, config, error_rate, rng, after, editable):
+    """Draw slips (and their corrections) at a per-key ``error_rate``.
+
+    Only keys in the ``editable`` mask can slip, when it is given.
+    """
+    keys = plan["key"]
+    errors = rng.random(len(plan)) < error_rate
+    if editable is not None:
+        errors &= editable
+    error_idx = np.flatnonzero(errors)
+    if error_idx.size == 0:
+        return
+    error_types = config["ERROR_TYPES"]
+    chosen = rng.integers(len(error_types), size=error_idx.size)
+    wrong = keys[error_idx].copy()
+    kinds = np.zeros(error_idx.size, dtype="u1")
+    for type_index, error_type in enumerate(error_types):
+        mask = chosen == type_index
+        kinds[mask] = ERROR_CODES.get(error_type, ERROR_NONE)
+        if error_type == "adjacent":
+            layout = get_layout_index(config.get("KEYBOARD_LAYOUT", "qwerty"))
+            adjacent = layout.sample(keys[error_idx[mask]], rng)
+            # Keys that are not on the layout (spaces, emoji, ...) cannot slip
+            kinds[np.flatnonzero(mask)[adjacent == ""]] = ERROR_NONE
+            wrong[mask] = adjacent
+        elif error_type == "transpose":
+            # Type the next character first; the last character has none
+            following = np.append(keys, after[:1] or keys[-1])
+            wrong[mask] = following[error_idx[mask] + 1]
+        elif error_type == "omit":
+            wrong[mask] = ""
+    if editable is not None:
+        fragile = np.isin(wrong, CODE_FRAGILE_KEYS)
+        kinds[fragile] = ERROR_NONE
+        wrong[fragile] = ""
+    plan["error"][error_idx] = kinds
+    plan["wrong"][error_idx] = wrong
+    if not config.get("KEEP_ERRORS", False):
+        plan["correct"][error_idx] = wrong != ""
+        plan["hesitation"][error_idx] = rng.uniform(
+            *CORRECTION_HESITATION, error_idx.size
+        )
+        plan["backspace"][error_idx] = config.get("BACKSPACE_DELAY", 100)
+
+
+def _fit_to_speed(plan, cpm_mean):
+    """Rescale a plan to take as long as typing its keys at ``cpm_mean``.
+
+    Pauses and corrections are paid for out of that budget instead of on
+    top of it, and shrink when they would leave the keys less than
+    MIN_KEY_SHARE of it.
+    """
+    budget = np.count_nonzero(~plan["auto"]) * 60000 / cpm_mean
+    correct = plan["correct"]
+    overhead = (
+        plan["pause"].sum(dtype=np.float64)
+        + plan["hesitation"][correct].sum(dtype=np.float64)
+        + plan["backspace"][correct].sum(dtype=np.float64)
+    )
+    limit = budget * (1 - MIN_KEY_SHARE)
+    if overhead > limit:
+        for field in ("pause", "hesitation", "backspace"):
+            plan[field] *= limit / overhead
+        overhead = limit
+    typing = plan["delay"].sum(dtype=np.float64)
+    if typing > 0:
+        plan["delay"] *= (budget - overhead) / typing
+
+
+def _plan_pauses(keys, rng, start=0):
+    """Pick the human pause (ms, PAUSE_* kind) before each of ``keys[start:]``.
+
+    Earlier positions only provide context for the features.
+    """
+    n = keys.size
+    features = text_features(keys)
+    fired = {}
+    for kind, feature, chance in PAUSE_RULES:
+        mask = features[feature]
+        if chance < 1:
+            mask = mask & (rng.random(n) < chance)
+        fired[kind] = fired[kind] | mask if kind in fired else mask
+
+    pauses = np.zeros(n - start, dtype=np.float32)
+    kinds = np.zeros(n - start, dtype="u1")
+    taken = np.zeros(n, dtype=bool)
+    for kind, mask in fired.items():  # Highest priority first
+        mask = mask & ~taken
+        taken |= mask
+        mask = mask[start:]
+        pauses[mask] = rng.uniform(*PAUSE_RANGES[kind], np.count_nonzero(mask))
+        kinds[mask] = kind
+    return pauses, kinds
+
+
+def _move_pauses(plan):
+    """Move pauses off keys the editor inserts onto the next typed key.
+
+    The typed key keeps its own pause if that one has a higher priority
+    (a lower PAUSE_* number).
+    """
+    typed = np.flatnonzero(~plan["auto"])
+    for i in np.flatnonzero(plan["auto"] & (plan["pause_kind"] != PAUSE_NONE)):
+        following = np.searchsorted(typed, i)
+        if following < typed.size:
+            j = typed[following]
+            kind = plan["pause_kind"][j]
+            if kind == PAUSE_NONE or kind > plan["pause_kind"][i]:
+                plan["pause"][j] = plan["pause"][i]
+                plan["pause_kind"][j] = plan["pause_kind"][i]
+        plan["pause"][i] = 0
+        plan["pause_kind"][i] = PAUSE_NONE
@@ -0,0 +1,43 @@
+"""Progress reporting from the typing thread to observers such as the GUI."""
+
+from collections import deque, namedtuple
+
+ProgressSnapshot = namedtuple(
+    "ProgressSnapshot",
+    [
+        "done",  # Characters of the source typed so far
+        "total",  # Source length in characters, None if unknown (streams)
+        "wpm",  # Achieved rolling WPM
+        "errors",  # Typing errors made so far
+        "paused",  # Whether typing is currently paused
+        "finished",  # Set on the last snapshot of a run
+        "eta",  # Estimated seconds left, None if unknown
+    ],
+    defaults=(None,),
+)
+
+
+class ProgressChannel:
+    """Bounded single-producer queue of progress snapshots.
+
+    Backed by a deque whose append and popleft are atomic, so the typing
+    thread never takes a lock or waits on the reader. When the reader falls
+    behind, the oldest snapshots are dropped; only the latest ones matter.
+    """
+
+    def __init__(self, maxlen=64):
+        self._snapshots = deque(maxlen=maxlen)
+
+    def publish(self, snapshot):
+        """Queue a snapshot (called from the typing thread)."""
+        self._snapshots.append(snapshot)
+
+    def drain(self):
+        """Remove and return every queued snapshot, oldest first."""
+        snapshots = []
+        popleft = self._snapshots.popleft
+        while True:
+            try:
+                snapshots.append(popleft())
+            except IndexError:
+                return snapshots
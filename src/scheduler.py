@@ -0,0 +1,129 @@
+"""Drift-free deadline scheduling for keystroke emission."""
+
+import threading
+import time
+
+
+class DeadlineScheduler:
+    """Wait for absolute deadlines on time.perf_counter().
+
+    Each event's target time is the previous target plus its planned delay,
+    so the time spent inside the output backend is absorbed by the next wait
+    instead of being added on top of it.
+
+    Setting ``interrupt`` wakes a sleeping wait() at once; only the final
+    busy-wait stretch is not interruptible.
+    """
+
+    def __init__(self, spin_threshold=0.002, max_lag=0.25, interrupt=None):
+        self.spin_threshold = spin_threshold  # Busy-wait the last stretch (s)
+        self.max_lag = max_lag  # Give up catching up beyond this lag (s)
+        self.interrupt = interrupt if interrupt is not None else threading.Event()
+        self.deadline = time.perf_counter()
+
+    def start(self):
+        """Anchor the schedule at the current time."""
+        self.deadline = time.perf_counter()
+
+    def advance(self, delay_ms):
+        """Move the next deadline forward by a planned delay."""
+        self.deadline += delay_ms / 1000
+
+    def shift(self, seconds):
+        """Push the schedule back, e.g. by the length of a pause."""
+        self.deadline += seconds
+
+    def wait(self):
+        """Block until the current deadline, returning the lateness in seconds.
+
+        Returns None without reaching the deadline if interrupted.
+        """
+        if self.interrupt.is_set():
+            return None
+        now = time.perf_counter()
+        remaining = self.deadline - now
+        if remaining < -self.max_lag:
+            # Stalled for too long (e.g. machine suspended); re-anchor
+            # instead of bursting out the backlog
+            self.deadline = now
+            return -remaining
+        if remaining > self.spin_threshold:
+            if self.interrupt.wait(remaining - self.spin_threshold):
+                return None
+        while time.perf_counter() < self.deadline:
+            pass
+        return max(time.perf_counter() - self.deadline, 0.0)
+
+
+class AsyncDeadlineScheduler:
+    """Awaitable counterpart of DeadlineScheduler for use inside asyncio.
+
+    Deadlines are kept on the event loop's clock. There is no busy-wait
+    stretch, since spinning would stall every other session on the loop,
+    so timing is as accurate as the loop's own timers.
+
+    interrupt() wakes a pending wait() at once, like setting the
+    ``interrupt`` event of a DeadlineScheduler.
+    """
+
+    def __init__(self, max_lag=0.25):
+        import asyncio  # Only asyncio users pay for importing it
+
+        self.max_lag = max_lag  # Give up catching up beyond this lag (s)
+        self.deadline = 0.0
+        self.interrupted = False
+        self._asyncio = asyncio
+        self._loop = None
+        self._waiter = None  # Future a pending wait() sleeps on
+
+    def start(self):
+        """Anchor the schedule at the current loop time (call inside the loop)."""
+        self._loop = self._asyncio.get_running_loop()
+        self.deadline = self._loop.time()
+
+    def advance(self, delay_ms):
+        """Move the next deadline forward by a planned delay."""
+        self.deadline += delay_ms / 1000
+
+    def shift(self, seconds):
+        """Push the schedule back, e.g. by the length of a pause."""
+        self.deadline += seconds
+
+    def interrupt(self, interrupted=True):
+        """Make wait() return None at once, waking a pending one, until cleared.
+
+        Call from the loop's thread.
+        """
+        self.interrupted = interrupted
+        if interrupted and self._waiter is not None:
+            _settle(self._waiter)
+
+    async def wait(self):
+        """Sleep until the current deadline, returning the lateness in seconds.
+
+        Returns None without reaching the deadline if interrupted.
+        """
+        if self.interrupted:
+            return None
+        now = self._loop.time()
+        remaining = self.deadline - now
+        if remaining < -self.max_lag:
+            self.deadline = now
+            return -remaining
+        if remaining > 0:
+            waiter = self._waiter = self._loop.create_future()
+            timer = self._loop.call_later(remaining, _settle, waiter)
+            try:
+                await waiter
+            finally:
+                timer.cancel()
+                self._waiter = None
+            if self.interrupted:
+                return None
+        return max(self._loop.time() - self.deadline, 0.0)
+
+
+def _settle(future):
+    """Wake whoever awaits ``future``, unless it is already done."""
+    if not future.done():
+        future.set_result(None)
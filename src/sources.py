@@ -0,0 +1,172 @@
+"""Chunked text sources for streaming very large inputs."""
+
+import bisect
+import codecs
+import mmap
+import os
+
+CHUNK_SIZE = 64 * 1024  # Characters (or bytes for files) per chunk
+PAGE_SIZE = 16 * 1024  # Bytes per FileDocument preview page
+
+
+def iter_text_chunks(source, chunk_size=CHUNK_SIZE):
+    """Yield string chunks from a str, file object or iterable of strings."""
+    if isinstance(source, str):
+        for start in range(0, len(source), chunk_size):
+            yield source[start:start + chunk_size]
+    elif hasattr(source, "read"):
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        while True:
+            chunk = source.read(chunk_size)
+            if not chunk:
+                break
+            if isinstance(chunk, bytes):
+                chunk = decoder.decode(chunk)
+            if chunk:
+                yield chunk
+        tail = decoder.decode(b"", final=True)
+        if tail:
+            yield tail
+    else:
+        for chunk in source:
+            if chunk:
+                yield chunk
+
+
+def _translate_newlines(text):
+    """Turn "\r\n" and lone "\r" into "\n", as text-mode open() does."""
+    return text.replace("\r\n", "\n").replace("\r", "\n")
+
+
+def iter_newlines(chunks):
+    """Translate newlines in a chunk stream, even when "\r\n" straddles chunks."""
+    carry = ""  # A trailing "\r" waits to see whether "\n" follows
+    for chunk in chunks:
+        chunk = carry + chunk
+        carry = "\r" if chunk.endswith("\r") else ""
+        chunk = _translate_newlines(chunk[:len(chunk) - len(carry)])
+        if chunk:
+            yield chunk
+    if carry:
+        yield "\n"
+
+
+def iter_file_chunks(path, chunk_size=CHUNK_SIZE, encoding="utf-8"):
+    """Yield decoded chunks of a file through a read-only memory map.
+
+    Newlines are translated to "\n" like a text-mode open().
+    """
+    yield from iter_newlines(_iter_raw_file_chunks(path, chunk_size, encoding))
+
+
+def _iter_raw_file_chunks(path, chunk_size, encoding):
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return  # Empty files cannot be memory-mapped
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            decoder = codecs.getincrementaldecoder(encoding)()
+            for start in range(0, len(mm), chunk_size):
+                chunk = decoder.decode(mm[start:start + chunk_size])
+                if chunk:
+                    yield chunk
+            tail = decoder.decode(b"", final=True)
+            if tail:
+                yield tail
+
+
+class FileDocument:
+    """A UTF-8 text file kept on disk and read through a memory map.
+
+    Opening it indexes page boundaries and character counts in one pass,
+    after which any page decodes on its own, so a viewer can show a large
+    file one page at a time while a run streams it with ``chunks``.
+    """
+
+    def __init__(self, path, page_size=PAGE_SIZE):
+        self.path = path
+        stat = os.stat(path)
+        # Tells a checkpoint taken on this file from one on an edited copy
+        self.identity = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+        self._file = open(path, "rb")
+        self._map = None
+        self.page_starts = [0]  # Byte offset of each page
+        self.page_offsets = [0]  # Character offset of each page
+        try:
+            if stat.st_size:
+                self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+                self._index(page_size)
+        except BaseException:
+            self.close()  # E.g. a UnicodeDecodeError on a binary file
+            raise
+
+    def _index(self, page_size):
+        """Find the page boundaries and count the characters of each page."""
+        size = len(self._map)
+        start = 0
+        while start < size:
+            end = min(start + page_size, size)
+            while end < size and self._map[end] & 0xC0 == 0x80:
+                end += 1  # Never split a character
+            if end < size and self._map[end - 1:end + 1] == b"\r\n":
+                end += 1  # Nor a Windows line break
+            # Decoding validates the page as well as counting it
+            chars = len(self._decode(start, end))
+            self.page_starts.append(end)
+            self.page_offsets.append(self.page_offsets[-1] + chars)
+            start = end
+
+    def __len__(self):
+        return self.page_offsets[-1]
+
+    @property
+    def pages(self):
+        return max(len(self.page_starts) - 1, 1)
+
+    def page(self, number):
+        """Decoded text of page ``number``."""
+        if self._map is None:
+            return ""
+        return self._decode(self.page_starts[number], self.page_starts[number + 1])
+
+    def _decode(self, start, end):
+        """Text of a byte range, with newlines translated like ``chunks``."""
+        return _translate_newlines(self._map[start:end].decode("utf-8"))
+
+    def page_of(self, position):
+        """Number of the page holding character ``position``."""
+        return min(bisect.bisect_right(self.page_offsets, position) - 1, self.pages - 1)
+
+    def chunks(self, chunk_size=CHUNK_SIZE):
+        """Stream the whole file as decoded chunks."""
+        return iter_file_chunks(self.path, chunk_size)
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+        self._file.close()
+
+
+def iter_windows(chunks, window):
+    """Re-cut a chunk stream into fixed-size planning windows.
+
+    Yields ``(offset, before, text, after)`` where ``before`` holds up to five
+    preceding characters of lookbehind and ``after`` the next character of
+    lookahead ("" at the end). Window boundaries depend only on the text, not
+    on how the source happened to be chunked.
+    """
+    buf = ""
+    pos = 0  # Start of the next window within buf
+    offset = 0  # Absolute text offset of buf[pos]
+    before = ""
+    for chunk in chunks:
+        buf = buf[pos:] + chunk
+        pos = 0
+        # Need one extra character of lookahead past each full window
+        while len(buf) - pos > window:
+            text = buf[pos:pos + window]
+            yield offset, before, text, buf[pos + window]
+            before = (before + text)[-5:]
+            pos += window
+            offset += window
+    if len(buf) > pos:
+        yield offset, before, buf[pos:], ""
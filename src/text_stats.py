@@ -0,0 +1,62 @@
+"""Incremental word and character counting for edited text.
+
+Word boundaries are local, so the effect of inserting or deleting a span
+only depends on the span itself and the characters right next to it.
+"""
+
+
+def count_words(text):
+    """Count whitespace-separated words."""
+    return len(text.split())
+
+
+def insert_delta(left, inserted, right):
+    """Change in word count when ``inserted`` goes between ``left`` and ``right``."""
+    return count_words(left + inserted + right) - count_words(left + right)
+
+
+def delete_delta(left, deleted, right):
+    """Change in word count when ``deleted`` is removed from between its neighbours."""
+    return -insert_delta(left, deleted, right)
+
+
+class TextStats:
+    """Running word and character totals.
+
+    Full recounts run against a snapshot while edits keep arriving, so each
+    recount is tagged with a generation: deltas recorded after the snapshot
+    are replayed on top of its result, and deltas computed for edits that
+    predate it are dropped because the snapshot already contains them.
+    """
+
+    def __init__(self):
+        self.words = 0
+        self.chars = 0
+        self.generation = 0
+        self._words_since = 0
+        self._chars_since = 0
+
+    def add_words(self, delta, generation=None):
+        """Apply a word delta for an edit made during ``generation``."""
+        if generation is not None and generation != self.generation:
+            return  # Already part of a newer snapshot
+        self.words += delta
+        self._words_since += delta
+
+    def add_chars(self, delta):
+        """Apply a character delta; always known synchronously."""
+        self.chars += delta
+        self._chars_since += delta
+
+    def start_recount(self):
+        """Begin a full recount from a snapshot taken now; returns its generation."""
+        self.generation += 1
+        self._words_since = 0
+        self._chars_since = 0
+        return self.generation
+
+    def finish_recount(self, generation, words, chars):
+        """Apply a full recount result if no newer recount has started."""
+        if generation == self.generation:
+            self.words = words + self._words_since
+            self.chars = chars + self._chars_since
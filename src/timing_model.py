@@ -0,0 +1,209 @@
+"""Digraph-aware keystroke timing.
+
+The interval before a key depends on the key typed just before it: pairs
+typed with alternating hands are quick, pairs on the same finger are slow.
+A DigraphModel keeps one delay factor and one log-normal spread per
+character pair in a dense table, so a whole window of delays is shaped by
+a single fancy-indexed lookup. Tables start from a prior derived from the
+keyboard geometry and can be fit offline to recorded keystroke traces:
+
+    python -m src.timing_model run1.trace run2.trace -o model.npz
+"""
+
+import argparse
+import sys
+from functools import lru_cache
+import numpy as np
+from .keyboard_layout import LAYOUTS, layout_keys
+from .trace import TRACE_CLEAN, load_trace
+
+# Fingers, numbered from the left pinky; both thumbs share one slot
+LEFT_PINKY, LEFT_INDEX, RIGHT_INDEX, RIGHT_PINKY, THUMB = 0, 3, 4, 7, 8
+# Finger for each layout column, counted along the slant of the rows
+COLUMN_FINGERS = (0, 0, 1, 2, 3, 3, 4, 4, 5, 6, 7)
+
+# Prior delay factors by digraph class, relative to an average key
+ALTERNATE_HAND = 0.85
+SAME_HAND = 1.0
+SAME_FINGER = 1.4
+REPEAT_KEY = 1.1
+THUMB_PAIR = 0.9  # Either key on the space bar
+ROW_JUMP = 0.08  # Added per row travelled on the same hand
+SHIFTED = 0.25  # Added when the second key needs shift
+PRIOR_SPREAD = 0.12  # Log-normal sigma of every pair
+
+MAX_FIT_GAP_MS = 1000  # Longer gaps in a trace are pauses, not digraphs
+PRIOR_WEIGHT = 20  # Observations a fitted pair needs to outweigh the prior
+
+
+def _key_geometry(layout):
+    """Return ``{char: (finger, row, shifted)}`` for a layout plus space and friends."""
+    geometry = {}
+    for char, shifted, x, y in layout_keys(layout):
+        column = int(x - 0.25 * y)
+        finger = COLUMN_FINGERS[min(column, len(COLUMN_FINGERS) - 1)]
+        geometry.setdefault(char, (finger, y, False))
+        if shifted:
+            geometry.setdefault(shifted, (finger, y, True))
+    geometry[" "] = (THUMB, 4, False)
+    geometry["\n"] = (RIGHT_PINKY, 2, False)
+    geometry["\t"] = (LEFT_PINKY, 1, False)
+    return geometry
+
+
+class DigraphModel:
+    """Dense per-digraph delay factors and spreads.
+
+    ``chars`` holds the sorted code points the table knows; every other
+    character shares the last row and column. ``factors[a, b]`` scales the
+    delay of typing ``b`` right after ``a`` and ``spreads[a, b]`` is the
+    log-normal sigma of that delay.
+    """
+
+    def __init__(self, chars, factors, spreads):
+        self.chars = np.asarray(chars, dtype=np.uint32)
+        self.factors = np.asarray(factors, dtype=np.float32)
+        self.spreads = np.asarray(spreads, dtype=np.float32)
+
+    @classmethod
+    def from_layout(cls, layout="qwerty"):
+        """Build the geometric prior for a keyboard layout."""
+        geometry = _key_geometry(layout)
+        chars = sorted(geometry)
+        finger, row, shifted = (np.array(column) for column in zip(*(geometry[c] for c in chars)))
+        # One extra slot for characters that are not on the layout
+        finger = np.append(finger, -1)
+        row = np.append(row, 0)
+        shifted = np.append(shifted, False)
+        hand = np.where(finger < 0, -1, np.where(finger <= LEFT_INDEX, 0, 1))
+        hand[finger == THUMB] = 2
+
+        first, second = np.ix_(np.arange(finger.size), np.arange(finger.size))
+        same_hand = hand[first] == hand[second]
+        same_finger = finger[first] == finger[second]
+        factors = np.where(same_hand, SAME_HAND, ALTERNATE_HAND)
+        factors = np.where(same_finger, SAME_FINGER, factors)
+        factors = np.where(first == second, REPEAT_KEY, factors)
+        factors += np.where(same_hand, ROW_JUMP * np.abs(row[first] - row[second]), 0)
+        thumb = (hand[first] == 2) | (hand[second] == 2)
+        factors = np.where(thumb, THUMB_PAIR, factors)
+        factors += np.where(shifted[second], SHIFTED, 0)
+        unknown = (finger[first] < 0) | (finger[second] < 0)
+        factors = np.where(unknown, 1.0, factors)
+        spreads = np.full(factors.shape, PRIOR_SPREAD)
+        return cls([ord(c) for c in chars], factors, spreads)
+
+    @classmethod
+    def load(cls, path):
+        """Load a table saved with save()."""
+        with np.load(path) as data:
+            return cls(data["chars"], data["factors"], data["spreads"])
+
+    def save(self, path):
+        """Save the table as an .npz file."""
+        np.savez_compressed(path, chars=self.chars, factors=self.factors, spreads=self.spreads)
+
+    def indices(self, keys):
+        """Table row of every character in a "<U1" array."""
+        codes = np.asarray(keys, dtype="<U1").view(np.uint32)
+        index = np.minimum(np.searchsorted(self.chars, codes), len(self.chars) - 1)
+        return np.where(self.chars[index] == codes, index, len(self.chars))
+
+    def sample(self, keys, rng, start=1):
+        """Draw a delay multiplier for each of ``keys[start:]`` from its digraph.
+
+        ``keys[start - 1]`` is the character before the first multiplier;
+        with ``start=0`` the first key has no predecessor and gets the
+        average factor. Multipliers are normalised to a mean of 1, so the
+        configured speed stays the average speed.
+        """
+        index = self.indices(keys)
+        if start == 0:
+            index = np.append(len(self.chars), index)  # Unknown predecessor
+        pair = (index[:-1], index[1:])
+        sigma = self.spreads[pair]
+        noise = np.exp(sigma * rng.standard_normal(sigma.size) - sigma ** 2 / 2)
+        multipliers = self.factors[pair] * noise
+        return multipliers / multipliers.mean() if multipliers.size else multipliers
+
+    def fit(self, traces, prior_weight=PRIOR_WEIGHT):
+        """Return a copy of this model fit to recorded keystroke traces.
+
+        Only gaps between two cleanly typed keys of at most MAX_FIT_GAP_MS
+        count. Each pair's factor and spread are pulled towards this model's
+        values in proportion to how rarely the pair was observed.
+        """
+        size = len(self.chars) + 1
+        counts = np.zeros(size * size)
+        log_sum = np.zeros(size * size)
+        log_square = np.zeros(size * size)
+        for trace in traces:
+            if len(trace) < 2:
+                continue
+            index = self.indices(trace["key"])
+            gap = np.asarray(trace["actual"][1:], dtype=float)
+            clean = (trace["error"][1:] == TRACE_CLEAN) & (trace["error"][:-1] == TRACE_CLEAN)
+            valid = clean & (gap > 0) & (gap <= MAX_FIT_GAP_MS)
+            pair = (index[:-1] * size + index[1:])[valid]
+            logs = np.log(gap[valid])
+            counts += np.bincount(pair, minlength=size * size)
+            log_sum += np.bincount(pair, logs, minlength=size * size)
+            log_square += np.bincount(pair, logs ** 2, minlength=size * size)
+        if not counts.any():
+            raise ValueError("No clean keystroke pairs to fit")
+
+        seen = counts > 0
+        mean = np.zeros_like(log_sum)
+        mean[seen] = log_sum[seen] / counts[seen]
+        variance = np.zeros_like(log_sum)
+        variance[seen] = np.maximum(log_square[seen] / counts[seen] - mean[seen] ** 2, 0)
+        observed = np.exp(mean + variance / 2)  # Mean gap of each pair (ms)
+        # Rescale to the prior's units: same average over the observed pairs
+        prior = self.factors.ravel()
+        observed *= (counts * prior).sum() / (counts * observed).sum()
+        weight = counts / (counts + prior_weight)
+        factors = prior * (1 - weight) + observed * weight
+        spreads = self.spreads.ravel() * (1 - weight) + np.sqrt(variance) * weight
+        return DigraphModel(
+            self.chars, factors.reshape(size, size), spreads.reshape(size, size)
+        )
+
+
+@lru_cache(maxsize=None)
+def get_timing_model(layout="qwerty", path=None):
+    """Load (once) the model at ``path``, or the geometric prior of ``layout``."""
+    if path is not None:
+        return DigraphModel.load(path)
+    if layout not in LAYOUTS:
+        raise ValueError(f"Unknown keyboard layout: {layout}")
+    return DigraphModel.from_layout(layout)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Fit a digraph timing model to recorded keystroke traces."
+    )
+    parser.add_argument("traces", nargs="+", metavar="TRACE", help="trace files to fit")
+    parser.add_argument("-o", "--output", required=True, help="where to save the .npz model")
+    parser.add_argument(
+        "-l", "--layout", choices=list(LAYOUTS), default="qwerty",
+        help="layout of the prior the fit starts from (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--prior-weight", type=float, default=PRIOR_WEIGHT,
+        help="observations a pair needs to outweigh the prior (default: %(default)s)",
+    )
+    args = parser.parse_args(argv)
+    try:
+        model = DigraphModel.from_layout(args.layout).fit(
+            (load_trace(path) for path in args.traces), args.prior_weight
+        )
+    except (OSError, ValueError) as e:
+        print(f"timing-model: {e}", file=sys.stderr)
+        return 1
+    model.save(args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,110 @@
+"""Compact binary keystroke traces.
+
+Records are fixed-width (see TRACE_DTYPE) and collected in a preallocated
+ring buffer. Flushed traces are plain record arrays behind a small header,
+so ``load_trace`` memory-maps them straight into NumPy without parsing.
+"""
+
+import os
+import numpy as np
+
+TRACE_DTYPE = np.dtype([
+    ("time", "<f8"),  # Emission time on time.perf_counter() (s)
+    ("key", "<U1"),  # Emitted character, "\b" for backspace
+    ("planned", "<f4"),  # Planned gap since the previous key (ms)
+    ("actual", "<f4"),  # Realised gap since the previous key (ms)
+    ("error", "u1"),  # TRACE_* flag
+])
+
+# Error flags
+TRACE_CLEAN = 0
+TRACE_ERROR = 1  # Wrong key typed
+TRACE_CORRECTION = 2  # Backspace or retyped key fixing an error
+
+TRACE_MAGIC = b"HTSTRACE"
+TRACE_VERSION = 1
+HEADER_SIZE = 16  # Magic, version, record size, padding
+
+
+def _header():
+    header = np.zeros(1, dtype=[("magic", "S8"), ("version", "<u4"), ("itemsize", "<u4")])
+    header[0] = (TRACE_MAGIC, TRACE_VERSION, TRACE_DTYPE.itemsize)
+    return header.tobytes()
+
+
+class TraceRecorder:
+    """Append keystroke records to a bounded ring buffer.
+
+    With a ``path`` the buffer is flushed to that file whenever it fills up,
+    so every record is kept on disk; without one the oldest records are
+    overwritten. Memory use is fixed by ``capacity`` either way.
+    """
+
+    def __init__(self, capacity=65536, path=None):
+        self.buffer = np.zeros(capacity, dtype=TRACE_DTYPE)
+        self.capacity = capacity
+        self.path = path
+        self.count = 0  # Records currently buffered
+        self.total = 0  # Records ever recorded
+        self._next = 0  # Ring position of the next record
+        self._last_time = None
+
+    def mark(self, now):
+        """Set the reference time the next record's actual gap is measured from."""
+        self._last_time = now
+
+    def shift(self, seconds):
+        """Move the reference time forward, leaving a suspended stretch out of the gaps."""
+        if self._last_time is not None:
+            self._last_time += seconds
+
+    def record(self, now, key, planned, error=TRACE_CLEAN):
+        """Append one keystroke record."""
+        actual = 0.0 if self._last_time is None else (now - self._last_time) * 1000
+        self._last_time = now
+        self.buffer[self._next] = (now, key, planned, actual, error)
+        self._next += 1
+        self.total += 1
+        if self.count < self.capacity:
+            self.count += 1
+        if self._next == self.capacity:
+            self._next = 0
+            if self.path is not None:
+                self.flush()
+
+    def records(self):
+        """Return the buffered records in chronological order."""
+        if self.count < self.capacity:
+            return self.buffer[self._next - self.count:self._next].copy()
+        return np.concatenate((self.buffer[self._next:], self.buffer[:self._next]))
+
+    def flush(self):
+        """Append buffered records to the trace file and empty the buffer."""
+        if self.path is None or self.count == 0:
+            return
+        records = self.records()
+        new_file = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+        with open(self.path, "ab") as f:
+            if new_file:
+                f.write(_header())
+            f.write(records.tobytes())
+        self.count = 0
+        self._next = 0
+
+    def close(self):
+        """Flush any remaining records."""
+        self.flush()
+
+
+def load_trace(path):
+    """Memory-map a trace file as a read-only TRACE_DTYPE array."""
+    with open(path, "rb") as f:
+        header = f.read(HEADER_SIZE)
+    if len(header) < HEADER_SIZE or header[:8] != TRACE_MAGIC:
+        raise ValueError(f"{path} is not a keystroke trace file")
+    version = int.from_bytes(header[8:12], "little")
+    if version != TRACE_VERSION:
+        raise ValueError(f"Unsupported trace version {version} in {path}")
+    if os.path.getsize(path) == HEADER_SIZE:
+        return np.zeros(0, dtype=TRACE_DTYPE)
+    return np.memmap(path, dtype=TRACE_DTYPE, mode="r", offset=HEADER_SIZE)
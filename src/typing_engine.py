@@ -1,101 +1,627 @@
 """Core typing simulation engine."""
 
-import random
+import threading
 import time
-import pyautogui
-from .utils import generate_delay, debug_print
-from .keyboard_layout import get_adjacent_key
+from collections import namedtuple
+import numpy as np
+from .utils import debug_print, new_seed
+from .planner import CODE_FRAGILE_KEYS, compile_plan
+from .scheduler import DeadlineScheduler
+from .backends import get_backend
+from .sources import iter_text_chunks, iter_windows
+from .trace import TraceRecorder, TRACE_CLEAN, TRACE_ERROR, TRACE_CORRECTION
+from .metrics import TypingMetrics
+from .progress import ProgressChannel, ProgressSnapshot
+from .plan_cache import get_plan_cache, plan_key
+from .code_mode import EditorModel
+from .config import compile_settings
+from .estimate import estimate_run, eta, profile_text
+
+# Steps yielded by the shared emission logic (see _plan_steps) to the
+# engine's driver: wait for the next deadline (replied to with whether to go
+# on), or write, press or paste through the backend (replied to with the
+# time the call started)
+STEP_WAIT, STEP_WRITE, STEP_PRESS, STEP_PASTE = range(4)
+
+# Where a stopped run left off: enough to re-plan its window exactly
+Checkpoint = namedtuple(
+    "Checkpoint",
+    [
+        "seed",  # Seed of the stopped run
+        "offset",  # Source offset of the planning window it stopped in
+        "rng_state",  # Generator state right before that window was planned
+        "index",  # Plan event of that window to continue from
+        "position",  # Characters of the source already typed
+        "editor_state",  # Code mode EditorModel state before that window
+    ],
+    defaults=(None,),
+)
+
+# One planned stretch of the source: a planning window, or the rest of one
+# replanned after a settings change
+PlannedWindow = namedtuple(
+    "PlannedWindow",
+    [
+        "offset",  # Source offset of the first key
+        "before",  # Lookbehind context
+        "text",
+        "after",  # Lookahead context
+        "rng_state",  # Generator state it was planned from
+        "editor_state",  # Code mode EditorModel state it was planned from
+        "plan",
+    ],
+)
 
 
 class TypingSimulator:
-    def __init__(self, config):
-        self.config = config
-        self.cpm_mean = config["WPM_MEAN"] * 5
-        self.cpm_std = config["WPM_STD"] * 5
-        self.base_error_rate = config["ERROR_RATE"]
-        self.current_speed = 0
-        self.stop_typing = False  # Add stop flag
-        pyautogui.MINIMUM_DURATION = 0  # Remove artificial delay
-        pyautogui.PAUSE = 0  # Remove pause between actions
-
-    def type_text(self, text):
+    def __init__(self, config, backend=None, trace=None):
+        # Immutable config snapshot; see configure()
+        self.settings = compile_settings(config)
+        self.backend = backend  # Created on first use when not given
+        if trace is None and config.get("TRACE_FILE"):
+            trace = TraceRecorder(config.get("TRACE_CAPACITY", 65536), config["TRACE_FILE"])
+        self.trace = trace  # Optional keystroke TraceRecorder
+        self.metrics = TypingMetrics()
+        self.progress = ProgressChannel()  # Snapshots for observers like the GUI
+        self.position = 0  # Characters of the current source typed so far
+        self.total = None  # Length of the current source, if known
+        self.expected = None  # Upfront Estimate of the current source, if given
+        self._start_position = 0  # Where the current run started in the source
+        self._next_progress = 0.0
+        self.checkpoint = None  # Set when a run is stopped before the end
+        self._window = None  # PlannedWindow being typed
+        self.paste_spans = ()  # (start, end) source ranges to paste, not type
+        self.editor = None  # code_mode.EditorModel of the current source in code mode
+        self._stop_requested = False
+        self._prepared = False  # prepare() was called for the next run
+        self._interrupt = threading.Event()  # Wakes scheduler waits on stop/pause
+        self._running = threading.Event()  # Cleared while paused
+        self._running.set()
+        # Every random draw comes from this generator; see reseed()
+        self.seed = None
+        self.rng = None
+        self.reseed(config.get("SEED"))
+        self.scheduler = DeadlineScheduler(
+            config.get("SCHEDULER_SPIN_MS", 2) / 1000,
+            config.get("SCHEDULER_MAX_LAG_MS", 250) / 1000,
+            self._interrupt,
+        )
+
+    @property
+    def config(self):
+        """Read-only view of the current settings' config."""
+        return self.settings.config
+
+    @property
+    def cpm_mean(self):
+        """Mean target speed in characters per minute."""
+        return self.settings.cpm_mean
+
+    @property
+    def cpm_std(self):
+        """Target speed variation in characters per minute."""
+        return self.settings.cpm_std
+
+    @property
+    def base_error_rate(self):
+        """Error rate at the mean speed."""
+        return self.settings.error_rate
+
+    def configure(self, config):
+        """Publish new settings from a config dict, from any thread.
+
+        A running run switches to them at its next key. Changes to speed,
+        errors or anything else that shapes the plan replan the rest of the
+        current window; the rest apply as they are.
+        """
+        self.settings = compile_settings(config)
+        return self.settings
+
+    @property
+    def current_speed(self):
+        """Achieved speed in characters per minute over the latest keys."""
+        return self.metrics.rolling_wpm() * 5
+
+    def timing_report(self):
+        """Realised metrics of the current or last run next to the configured target."""
+        report = self.metrics.snapshot()
+        report["target_wpm"] = self.cpm_mean / 5
+        return report
+
+    @property
+    def stop_typing(self):
+        """Whether a stop was requested; setting it to True calls stop()."""
+        return self._stop_requested
+
+    @stop_typing.setter
+    def stop_typing(self, value):
+        if value:
+            self.stop()
+
+    @property
+    def paused(self):
+        """Whether a pause was requested and not yet resumed."""
+        return not self._running.is_set()
+
+    def stop(self):
+        """Stop the current run within milliseconds, from any thread.
+
+        Where it stopped is saved in ``self.checkpoint``.
+        """
+        self._stop_requested = True
+        self._interrupt.set()
+        self._running.set()
+
+    def pause(self):
+        """Hold the current run at its next wait until resume() or stop()."""
+        self._running.clear()
+        self._interrupt.set()
+
+    def resume(self):
+        """Continue a paused run on its original schedule."""
+        if not self._stop_requested:
+            self._interrupt.clear()
+        self._running.set()
+
+    def prepare(self):
+        """Clear an earlier stop or pause ahead of the next run.
+
+        type_stream() does this itself unless prepare() was called first,
+        so a stop() in between, e.g. during the start delay, is honoured.
+        """
+        self._stop_requested = False
+        self._interrupt.clear()
+        self._running.set()
+        self._prepared = True
+
+    def reseed(self, seed=None):
+        """Restart the random generator from a seed (a fresh one if None)."""
+        self.seed = new_seed() if seed is None else seed
+        self.rng = np.random.default_rng(self.seed)
+        return self.seed
+
+    def type_text(self, text, seed=None):
         """Main typing method with human-like pauses."""
-        self.stop_typing = False  # Reset stop flag
-        prev_char = ''
-        for i, char in enumerate(text):
-            if self.stop_typing:
-                break
-            # Thinking moment: pause after sentence-ending punctuation or newlines
-            if prev_char in '.!?\n':
-                thinking_delay = random.uniform(0.6, 1.5)  # 0.6-1.5s pause
-                time.sleep(thinking_delay)
-            # Occasional mid-sentence hesitation (after comma or long word)
-            elif prev_char == ',' or (i > 4 and text[i-5:i].isalpha() and len(text[i-5:i]) > 4 and random.random() < 0.08):
-                hesitation_delay = random.uniform(0.2, 0.5)
-                time.sleep(hesitation_delay)
-            # Hand movement delay: switching between letter and non-letter
-            elif prev_char and ((prev_char.isalpha() and not char.isalpha()) or (not prev_char.isalpha() and char.isalpha())):
-                hand_move_delay = random.uniform(0.08, 0.18)
-                time.sleep(hand_move_delay)
-            self._type_char(i, char, text)
-            prev_char = char
-
-    def _calculate_dynamic_error_rate(self, delay):
-        """Calculate error rate based on current typing speed."""
-        speed_factor = (
-            60000 / delay
-        ) / self.cpm_mean  # Ratio of current speed to mean speed
-        return self.base_error_rate * (
-            1 + (speed_factor - 1) * 0.5
-        )  # Increase error rate with speed
-
-    def _type_char(self, index, char, text):
-        """Handle single character typing with error simulation and pauses."""
-        delay = generate_delay(self.cpm_mean, self.cpm_std, self.config["MIN_CPM"])
-        self.current_speed = 60000 / delay
-        dynamic_error_rate = self._calculate_dynamic_error_rate(delay)
-        debug_print(self.config, f"Typing '{char}' with delay {delay:.2f}ms")
-        # time.sleep(max(delay / 1000, 0.03))  # Always sleep for at least 30ms
-        if self.config.get("ENABLE_ERRORS", True) and random.random() < dynamic_error_rate:
-            error_type = random.choice(self.config["ERROR_TYPES"])
-            wrong_char = self._apply_error(error_type, char, index, text)
-            if wrong_char:
-                pyautogui.write(wrong_char, interval=0)
-                if not self.config.get("KEEP_ERRORS", False):
-                    # Hesitation before correction
-                    time.sleep(random.uniform(0.12, 0.35))
-                    pyautogui.press("backspace")
-                    time.sleep(self.config.get("BACKSPACE_DELAY", 100) / 1000)
-                    pyautogui.write(char, interval=0)
+        self.type_stream(text, seed)
+
+    def replay(self, source, seed):
+        """Re-type a source with exactly the keystrokes and timings of a past run.
+
+        Needs the same text and config as the original run; its seed is
+        available as ``simulator.seed`` after (or during) that run.
+        """
+        self.type_stream(source, seed)
+
+    def estimate(self, source):
+        """Estimate the duration and keystrokes of typing ``source`` now.
+
+        Costs one pass over the source; see src.estimate for re-estimating
+        a profiled text cheaply as settings change.
+        """
+        return estimate_run(profile_text(source, self.config), self.settings)
+
+    def type_stream(
+        self, source, seed=None, total=None, checkpoint=None, paste_spans=(), estimate=None,
+        start_delay=0.0,
+    ):
+        """Type text from a str, file object or iterable of string chunks.
+
+        The text is planned and emitted one bounded window at a time, so
+        memory use does not depend on the length of the input. Each run
+        starts from ``seed``, the SEED config entry or a fresh random seed,
+        and records it in ``self.seed``. ``total`` is the source length for
+        progress reports; it is taken from the source when that is a str.
+
+        Given the ``checkpoint`` of a stopped run over the same source and
+        config, typing continues exactly where that run stopped.
+
+        ``paste_spans`` are ``(start, end)`` source offsets of text to insert
+        with a clipboard paste instead of typing, e.g. long boilerplate.
+        Characters the backend cannot type are pasted as well unless
+        PASTE_UNTYPABLE is off.
+
+        Progress snapshots carry an ETA from the pace realised so far; an
+        ``estimate`` of the whole source (see ``estimate``) steadies it
+        until enough has been typed.
+
+        Typing starts after ``start_delay`` seconds; a stop() during the
+        delay ends the run before its first key.
+        """
+        windows = self._begin(source, seed, total, checkpoint, paste_spans, estimate)
+        if self.backend is None:
+            self.backend = get_backend(self.config.get("BACKEND", "auto"))
+        if start_delay > 0 and not self._stop_requested:
+            self._interrupt.wait(start_delay)  # Cut short by stop() or pause()
+        self._start_clock()
+        try:
+            self._drive(self._run(windows, checkpoint))
+        finally:
+            self._finish()
+
+    def _begin(self, source, seed, total, checkpoint, paste_spans, estimate):
+        """Reset the per-run state of type_stream; returns its lazy windows."""
+        self.paste_spans = sorted(paste_spans)
+        self.expected = estimate
+        if not self._prepared:
+            self.prepare()
+        self._prepared = False
+        self.checkpoint = None
+        self._window = None
+        self.total = len(source) if total is None and isinstance(source, str) else total
+        if checkpoint is None:
+            self.position = 0
+            self.reseed(seed if seed is not None else self.config.get("SEED"))
+        else:
+            self.position = checkpoint.position
+            self.seed = checkpoint.seed
+        self._start_position = self.position
+        debug_print(self.config, f"Typing with seed {self.seed}")
+        return self._compile_windows(source, checkpoint)
+
+    def _start_clock(self):
+        """Anchor the schedule, metrics and trace of a run at the current time."""
+        self.scheduler.start()
+        self.metrics.reset(self.scheduler.deadline)
+        if self.trace is not None:
+            self.trace.mark(self.scheduler.deadline)
+        self._next_progress = self.scheduler.deadline
+
+    def _finish(self):
+        """Flush the trace and publish the final snapshot of a run."""
+        if self.trace is not None:
+            self.trace.flush()
+        self._publish_progress(finished=True)
+
+    def iter_plans(self, source):
+        """Lazily compile a text source into one keystroke plan per window.
+
+        Plans may come from the shared plan cache and are then read-only.
+        """
+        for window in self._compile_windows(source):
+            yield window.plan
+
+    def _compile_windows(self, source, checkpoint=None):
+        """Yield a PlannedWindow for each planning window of a source.
+
+        With a checkpoint, the source before it is skipped unplanned and the
+        generator and editor model are rewound to where its stretch started.
+        """
+        editor = self.editor = EditorModel.from_config(self.config)
+        chunks = iter_text_chunks(source)
+        for offset, before, text, after in iter_windows(chunks, self.settings.plan_window):
+            if checkpoint is not None:
+                if offset + len(text) <= checkpoint.offset:
+                    continue
+                # Checkpoints of replanned stretches start inside a window
+                cut = checkpoint.offset - offset
+                before, text, offset = (before + text[:cut])[-5:], text[cut:], checkpoint.offset
+                self.rng.bit_generator.state = checkpoint.rng_state
+                if editor is not None:
+                    editor.restore(checkpoint.editor_state)
+                checkpoint = None
+            yield self._plan_stretch(offset, before, text, after)
+
+    def _replan(self, window, index):
+        """Plan a window again from event ``index`` with the current settings."""
+        if self.editor is not None:
+            self.editor.restore(window.editor_state)
+            self.editor.process(window.text[:index])
+        return self._plan_stretch(
+            window.offset + index, (window.before + window.text[:index])[-5:],
+            window.text[index:], window.after,
+        )
+
+    def _plan_stretch(self, offset, before, text, after):
+        """Plan text at ``offset`` into a PlannedWindow."""
+        rng_state = self.rng.bit_generator.state
+        editor_state = self.editor.state() if self.editor is not None else None
+        plan = self._plan_window(text, before, after)
+        return PlannedWindow(offset, before, text, after, rng_state, editor_state, plan)
+
+    def _plan_window(self, text, before, after):
+        """Compile one window, going through the plan cache when enabled."""
+        settings = self.settings
+        config = settings.config
+        cache = get_plan_cache(config)
+        editor = self.editor
+        if cache is None:
+            return compile_plan(
+                text, config, settings.cpm_mean, settings.cpm_std,
+                settings.error_rate, self.rng, before, after, editor,
+            )
+        before, after = before[-5:], after[:1]  # All the context the planner uses
+        key = plan_key(
+            text, before, after, config, settings.cpm_mean, settings.cpm_std,
+            settings.error_rate, self.rng, editor,
+        )
+        hit = cache.get(key)
+        if hit is not None:
+            plan, (rng_state, editor_state) = hit
+            self.rng.bit_generator.state = rng_state
+            if editor is not None:
+                editor.restore(editor_state)
+            return plan
+        plan = compile_plan(
+            text, config, settings.cpm_mean, settings.cpm_std,
+            settings.error_rate, self.rng, before, after, editor,
+        )
+        cache.put(
+            key, plan,
+            [self.rng.bit_generator.state, editor.state() if editor is not None else None],
+        )
+        return plan
+
+    def progress_snapshot(self, finished=False):
+        """Describe the current run as a ProgressSnapshot."""
+        return ProgressSnapshot(
+            self.position, self.total, self.metrics.rolling_wpm(),
+            self.metrics.errors, self.paused, finished, self._eta(finished),
+        )
+
+    def _eta(self, finished=False):
+        """Seconds left in the current run, or None if unknown."""
+        if finished:
+            return 0.0 if self.checkpoint is None else None
+        if self.total is None or self.metrics.start_time is None:
+            return None
+        expected = self.expected
+        pace = expected.seconds / self.total if expected is not None and self.total else None
+        return eta(
+            max(self.total - self.position, 0), self.position - self._start_position,
+            self.scheduler.deadline - self.metrics.start_time, pace,
+        )
+
+    def _publish_progress(self, finished=False):
+        """Publish a progress snapshot and schedule the next one."""
+        self.progress.publish(self.progress_snapshot(finished))
+        self._next_progress = self.scheduler.deadline + self.settings.progress_interval
+
+    def plan(self, text, seed=None):
+        """Compile text into the keystroke plan a run with this seed would type."""
+        self.reseed(seed if seed is not None else self.config.get("SEED"))
+        plans = list(self.iter_plans(text))
+        return np.concatenate(plans) if plans else compile_plan(
+            "", self.config, self.cpm_mean, self.cpm_std, self.base_error_rate, self.rng
+        )
+
+    def _wait(self):
+        """Wait for the next deadline, holding while paused.
+
+        Returns False, possibly early, once the run is stopped.
+        """
+        while self.scheduler.wait() is None:
+            if self._stop_requested:
+                return False
+            if not self._running.is_set():
+                self._hold()
+        return True
+
+    def _hold(self):
+        """Block while paused, then shift the schedule past the pause."""
+        paused_at = time.perf_counter()
+        self.progress.publish(self.progress_snapshot())
+        self._running.wait()
+        suspended = time.perf_counter() - paused_at
+        self.scheduler.shift(suspended)
+        self.metrics.shift(suspended)
+        if self.trace is not None:
+            self.trace.shift(suspended)
+        self._next_progress += suspended
+        self.progress.publish(self.progress_snapshot())
+
+    def _paste_mask(self, plan, offset):
+        """Mark the keys of a window at ``offset`` that get pasted.
+
+        In code mode, newlines, brackets and quotes are always typed, so
+        the editor indents and auto-closes them as its model expects.
+        """
+        keys = plan["key"]
+        if self.settings.paste_untypable:
+            mask = self._untypable(keys)
+        else:
+            mask = np.zeros(keys.shape, dtype=bool)
+        for start, end in self.paste_spans:
+            if start < offset + len(keys) and end > offset:
+                mask[max(start - offset, 0):end - offset] = True
+        if self.editor is not None:
+            mask &= ~(plan["auto"] | (plan["erase"] != 0) | np.isin(keys, CODE_FRAGILE_KEYS))
+        return mask
+
+    def _untypable(self, keys):
+        """Mask of the ``keys`` the backend cannot type."""
+        return ~self.backend.typable(keys)
+
+    def _drive(self, steps):
+        """Carry out the steps of a step generator, blocking; returns its result."""
+        backend = self.backend
+        wait = self._wait
+        write = self._timed_write
+        clock = time.perf_counter
+        reply = None
+        try:
+            while True:
+                op, arg = steps.send(reply)
+                if op == STEP_WAIT:
+                    reply = wait()
+                elif op == STEP_WRITE:
+                    reply = write(arg)
+                else:
+                    reply = clock()
+                    (backend.press if op == STEP_PRESS else backend.paste)(arg)
+        except StopIteration as done:
+            return done.value
+
+    def _execute_plan(self, plan, offset=0, first=0):
+        """Walk a compiled plan from event ``first`` and emit its keystrokes.
+
+        ``offset`` is the plan's position in the source. Returns the index
+        of the first event not emitted, which is ``len(plan)`` unless the
+        run was stopped or new settings need the rest replanned.
+        """
+        return self._drive(self._plan_steps(plan, offset, first))
+
+    def _run(self, windows, checkpoint=None):
+        """Steps of a whole run over PlannedWindows, resuming a checkpoint.
+
+        Sets ``self.checkpoint`` if the run is stopped before the end.
+        """
+        first = checkpoint.index if checkpoint is not None else 0
+        for window in windows:
+            self._window = window
+            index = yield from self._plan_steps(window.plan, window.offset, first)
+            first = 0
+            while index < len(window.plan) and not self._stop_requested:
+                window = self._window = self._replan(window, index)
+                index = yield from self._plan_steps(window.plan, window.offset)
+            if index < len(window.plan):  # Stopped
+                self.checkpoint = Checkpoint(
+                    self.seed, window.offset, window.rng_state, index, self.position,
+                    window.editor_state,
+                )
                 return
-        pyautogui.write(char, interval=0)
-
-    def _handle_errors(self, char, index, text):
-        """Simulate typing errors."""
-        if random.random() < self.config["ERROR_RATE"]:
-            error_type = random.choice(self.config["ERROR_TYPES"])
-            return self._apply_error(error_type, char, index, text), True
-        return char, False
-
-    def _apply_error(self, error_type, char, index, text):
-        """Apply specific error type."""
-        if error_type == "adjacent":
-            return get_adjacent_key(char)
-        elif error_type == "transpose" and index + 1 < len(text):
-            return text[index + 1]
-        elif error_type == "omit":
-            return ""
-        return char
-
-    def _handle_correction(self, original_char, index, text):
-        """Handle error correction."""
-        # Remove sleep for instant correction
-        # time.sleep(
-        #     random.uniform(
-        #         self.config["CORRECTION_DELAY_MIN"] / 1000,
-        #         self.config["CORRECTION_DELAY_MAX"] / 1000,
-        #     )
-        # )
-        pyautogui.press("backspace")
-        # time.sleep(self.config["BACKSPACE_DELAY"] / 1000)
-        pyautogui.typewrite(original_char)
+        yield from self._close_editor()
+
+    def _erase(self, count):
+        """Steps pressing backspace ``count`` times, or delete ``-count`` times."""
+        key, code = ("backspace", "\b") if count > 0 else ("delete", "\x7f")
+        for _ in range(abs(count)):
+            start = yield STEP_PRESS, key
+            self._record_key(start, code, 0.0)
+
+    def _close_editor(self):
+        """Steps removing what the editor inserted past the end of the text."""
+        if self.editor is not None:
+            count, text = self.editor.finish()
+            yield from self._erase(count)
+            if text:
+                start = yield STEP_WRITE, text
+                for key in text:
+                    self._record_key(start, key, 0.0)
+
+    def _plan_steps(self, plan, offset=0, first=0):
+        """Steps emitting a compiled plan from event ``first``; see _execute_plan.
+
+        Keeps ``self.position`` on the current event, also when closed
+        half way, e.g. by a cancelled async run.
+        """
+        settings = self.settings
+        debug, burst_mode, paste_delay = settings.debug, settings.burst_mode, settings.paste_delay
+        backend = self.backend
+        pastes = self._paste_mask(plan, offset).tolist()
+        autos = plan["auto"].tolist()
+        erases = plan["erase"].tolist()
+        keys = plan["key"].tolist()
+        delays = plan["delay"].tolist()
+        pauses = plan["pause"].tolist()
+        pause_kinds = plan["pause_kind"].tolist()
+        # A slip onto a key the backend cannot type would be dropped and its
+        # correction would erase a good character; type those keys cleanly
+        wrongs = plan["wrong"]
+        wrongs = np.where(self._untypable(wrongs), "", wrongs).tolist()
+        corrects = plan["correct"].tolist()
+        hesitations = plan["hesitation"].tolist()
+        backspaces = plan["backspace"].tolist()
+        n = len(keys)
+        scheduler = self.scheduler
+        record = self._record_key
+        record_pause = self.metrics.record_pause
+        wait = STEP_WAIT, None
+        i = first
+        try:
+            while i < n:
+                if self.settings is not settings:
+                    if self.settings.planning != settings.planning:
+                        break
+                    settings = self.settings
+                    debug, burst_mode = settings.debug, settings.burst_mode
+                    paste_delay = settings.paste_delay
+                if scheduler.deadline >= self._next_progress:
+                    self.position = offset + i
+                    self._publish_progress()
+                if autos[i]:  # Already inserted by the editor
+                    i += 1
+                    continue
+                char, delay = keys[i], delays[i]
+                if pauses[i]:
+                    record_pause(pause_kinds[i], pauses[i])
+                if pastes[i]:
+                    # One paste for the whole run, taking the place of its
+                    # keys on the schedule
+                    end = i + 1
+                    while end < n and pastes[end]:
+                        end += 1
+                    scheduler.advance(pauses[i] + paste_delay)
+                    if not (yield wait):
+                        break
+                    start = yield STEP_PASTE, "".join(keys[i:end])
+                    record(start, char, pauses[i] + paste_delay)
+                    for j in range(i + 1, end):
+                        record(start, keys[j], 0.0)
+                    i = end
+                    continue
+                scheduler.advance(pauses[i] + delay)
+                if not (yield wait):
+                    break
+                if debug:
+                    debug_print(self.config, f"Typing '{char}' with delay {delay:.2f}ms")
+                if erases[i]:
+                    yield from self._erase(erases[i])
+                wrong_char = wrongs[i]
+                if wrong_char:
+                    start = yield STEP_WRITE, wrong_char
+                    record(start, wrong_char, pauses[i] + delay, TRACE_ERROR)
+                    if corrects[i]:
+                        # Hesitation before correction; a stop skips the
+                        # remaining waits so the text is left corrected
+                        scheduler.advance(hesitations[i])
+                        yield wait
+                        start = yield STEP_PRESS, "backspace"
+                        record(start, "\b", hesitations[i], TRACE_CORRECTION)
+                        scheduler.advance(backspaces[i])
+                        yield wait
+                        start = yield STEP_WRITE, char
+                        record(start, char, backspaces[i], TRACE_CORRECTION)
+                    i += 1
+                    continue
+                # Coalesce following clean keys whose planned gaps are
+                # shorter than one backend call; emitting them at the first
+                # deadline finishes the burst around the last one
+                end = i + 1
+                call_cost = getattr(backend, "call_cost", 0.0)
+                if burst_mode and call_cost > 0:
+                    budget = call_cost * 1000
+                    span = 0
+                    while end < n and not (
+                        wrongs[end] or pauses[end] or pastes[end] or autos[end] or erases[end]
+                    ):
+                        if span + delays[end] >= budget:
+                            break
+                        span += delays[end]
+                        end += 1
+                    scheduler.advance(span)
+                start = yield STEP_WRITE, char if end == i + 1 else "".join(keys[i:end])
+                record(start, char, pauses[i] + delay)
+                for j in range(i + 1, end):
+                    record(start, keys[j], delays[j])
+                i = end
+        finally:
+            self.position = offset + i
+        return i
+
+    def _record_key(self, now, key, planned, error=TRACE_CLEAN):
+        """Feed one emitted key to the metrics and the optional trace."""
+        self.metrics.record_key(now, key, planned, error)
+        if self.trace is not None:
+            self.trace.record(now, key, planned, error)
+
+    def _timed_write(self, text):
+        """Write through the backend, tracking its average per-call cost.
+
+        Returns the time the write started.
+        """
+        backend = self.backend
+        start = time.perf_counter()
+        backend.write(text)
+        cost = time.perf_counter() - start
+        backend.call_cost += (cost - backend.call_cost) * 0.1
+        return start
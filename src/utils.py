@@ -1,16 +1,28 @@
 """Utility functions for typing simulation."""
 
+import os
 import numpy as np
 
-def generate_delay(cpm_mean, cpm_std, min_cpm):
-    """Generate typing delay in milliseconds."""
+def new_seed():
+    """Draw a fresh 64-bit seed for a simulator run."""
+    # os.urandom, like secrets, without importing secrets (inspect, tokenize)
+    return int.from_bytes(os.urandom(8), "little")
+
+def generate_delay(cpm_mean, cpm_std, min_cpm, rng):
+    """Generate typing delay in milliseconds, drawing from the Generator ``rng``."""
     if cpm_mean > 1000000:  # Ultra-fast mode
         return 0.001  # Minimal delay
-    cpm = max(np.random.normal(cpm_mean, cpm_std), min_cpm)
+    cpm = max(rng.normal(cpm_mean, cpm_std), min_cpm)
     return max(60000 / cpm, 0.001)  # Ensure minimal delay
 
+def generate_delays(cpm_mean, cpm_std, min_cpm, size, rng):
+    """Generate an array of typing delays in milliseconds in one draw."""
+    if cpm_mean > 1000000:  # Ultra-fast mode
+        return np.full(size, 0.001)
+    cpm = np.maximum(rng.normal(cpm_mean, cpm_std, size), min_cpm)
+    return np.maximum(60000 / cpm, 0.001)
+
 def debug_print(config, message):
     """Print debug messages if debug mode is enabled."""
     if config["DEBUG"]:
         print(message)
-
@@ -0,0 +1,86 @@
+import asyncio
+import time
+from src.async_engine import AsyncTypingSimulator
+from src.backends import RecordingBackend
+from src.config import DEFAULT_CONFIG
+from src.typing_engine import TypingSimulator
+
+CONFIG = dict(DEFAULT_CONFIG, PLAN_CACHE=False, WPM_MEAN=20, ENABLE_ERRORS=False)
+
+
+def test_stop_wakes_a_pending_wait():
+    simulator = AsyncTypingSimulator(CONFIG, RecordingBackend())
+
+    async def run():
+        task = asyncio.create_task(simulator.type_stream("hello world " * 20, 1))
+        await asyncio.sleep(0.3)
+        start = time.perf_counter()
+        simulator.stop()
+        await task
+        return time.perf_counter() - start
+
+    assert asyncio.run(run()) < 0.05
+    assert simulator.checkpoint is not None
+
+
+def test_stop_cuts_the_start_delay_short():
+    simulator = AsyncTypingSimulator(CONFIG, RecordingBackend())
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        loop.call_later(0.05, simulator.stop)
+        start = time.perf_counter()
+        await simulator.type_stream("hello world", 1, start_delay=5)
+        return time.perf_counter() - start
+
+    assert asyncio.run(run()) < 1
+    assert simulator.backend.events == []
+
+
+def test_paste_spans_match_the_sync_signature():
+    config = dict(CONFIG, WPM_MEAN=2000)
+    simulator = AsyncTypingSimulator(config, RecordingBackend())
+    asyncio.run(simulator.type_stream("ab boilerplate cd", 1, None, None, [(3, 14)]))
+    assert ("paste", "boilerplate") in [event[1:] for event in simulator.backend.events]
+    assert simulator.backend.text == "ab boilerplate cd"
+
+
+def test_editor_tail_is_recorded():
+    config = dict(CONFIG, WPM_MEAN=2000, CODE_MODE=True)
+    simulator = AsyncTypingSimulator(config, RecordingBackend())
+    asyncio.run(simulator.type_stream("if x:\n  ", 1))  # Ends retyping "  "
+    emitted = sum(
+        len(text) if kind != "press" else 1 for _, kind, text in simulator.backend.events
+    )
+    metrics = simulator.metrics
+    assert metrics.keys + metrics.corrections + metrics.edits == emitted
+
+
+def test_emits_the_same_keys_as_the_sync_engine():
+    config = dict(DEFAULT_CONFIG, PLAN_CACHE=False, WPM_MEAN=10000, ERROR_RATE=0.1)
+    text = "if ok:\n    print('hello, world')\n" * 3
+    for code in (False, True):
+        sync = TypingSimulator(dict(config, CODE_MODE=code), RecordingBackend())
+        sync.type_stream(text, 7)
+        simulator = AsyncTypingSimulator(dict(config, CODE_MODE=code), RecordingBackend())
+        asyncio.run(simulator.type_stream(text, 7))
+        assert [e[1:] for e in simulator.backend.events] == [e[1:] for e in sync.backend.events]
+
+
+def test_cancelled_run_resumes_from_its_checkpoint():
+    text = "hello world, " * 10
+    simulator = AsyncTypingSimulator(dict(CONFIG, WPM_MEAN=2000), RecordingBackend())
+
+    async def run():
+        task = asyncio.create_task(simulator.type_stream(text, 1))
+        await asyncio.sleep(0.1)
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        assert 0 < simulator.checkpoint.position < len(text)
+        await simulator.type_stream(text, checkpoint=simulator.checkpoint)
+
+    asyncio.run(run())
+    assert simulator.backend.text == text
@@ -0,0 +1,30 @@
+import sys
+import types
+import numpy as np
+from src.backends import PyAutoGUIBackend
+from src.planner import text_to_keys
+
+
+def _fake_pyautogui(monkeypatch, mapping=None):
+    """Install a stand-in pyautogui module; the real one needs a display."""
+    module = types.ModuleType("pyautogui")
+    module.KEYBOARD_KEYS = list("\t\n !\"#$%&'(),-./0123456789:;<=>?@[\\]^_`abcdefghijklmnopqrstuvwxyz{|}~")
+    module.KEYBOARD_KEYS += ["backspace", "enter", "shift"]
+    if mapping is not None:
+        module.platformModule = types.SimpleNamespace(keyboardMapping=mapping)
+    monkeypatch.setitem(sys.modules, "pyautogui", module)
+
+
+def test_pyautogui_types_capitals(monkeypatch):
+    _fake_pyautogui(monkeypatch)
+    backend = PyAutoGUIBackend()
+    assert backend.typable(text_to_keys("Hello World")).all()
+
+
+def test_pyautogui_uses_platform_mapping(monkeypatch):
+    mapping = {key: 1 for key in "abcdefghijklmnopqrstuvwxyz "}
+    mapping.update({"é": None, "enter": 2})
+    _fake_pyautogui(monkeypatch, mapping)
+    backend = PyAutoGUIBackend()
+    assert backend.typable(text_to_keys("Hello World")).all()
+    np.testing.assert_array_equal(backend.typable(text_to_keys("aé😀")), [True, False, False])
@@ -0,0 +1,129 @@
+import pathlib
+import numpy as np
+from src.backends import OutputBackend
+from src.code_mode import AUTO_PAIRS, EditorModel
+from src.config import DEFAULT_CONFIG
+from src.typing_engine import TypingSimulator
+
+SOURCE = (pathlib.Path(__file__).parent.parent / "src" / "code_mode.py").read_text()
+CONFIG = dict(
+    DEFAULT_CONFIG, PLAN_CACHE=False, CODE_MODE=True, WPM_MEAN=100000, ERROR_RATE=0.05,
+    PLAN_WINDOW=256,
+)
+
+
+class EditorBackend(OutputBackend):
+    """A code editor with VS Code's auto-indent, auto-close and tab stops."""
+
+    def __init__(self, unit="    ", stop_after=None):
+        self.buffer = []
+        self.cursor = 0
+        self.closers = 0  # Auto-inserted closers right after the cursor
+        self.unit = unit
+        self.keys = 0
+        self.stop_after = stop_after  # (keys, simulator) to stop once that many are sent
+
+    @property
+    def text(self):
+        return "".join(self.buffer)
+
+    def _line(self):
+        start = self.cursor
+        while start and self.buffer[start - 1] != "\n":
+            start -= 1
+        return start, "".join(self.buffer[start:self.cursor])
+
+    def _insert(self, text):
+        self.buffer[self.cursor:self.cursor] = text
+        self.cursor += len(text)
+
+    def _count(self):
+        self.keys += 1
+        if self.stop_after is not None and self.keys == self.stop_after[0]:
+            self.stop_after[1].stop()
+
+    def write(self, text):
+        for char in text:
+            self._count()
+            before = self.buffer[self.cursor - 1] if self.cursor else ""
+            if char == "\n":
+                start, line = self._line()
+                indent = line[:len(line) - len(line.lstrip(" "))]
+                if not line.strip():
+                    del self.buffer[start:self.cursor]  # Trim a blank line's indentation
+                    self.cursor = start
+                elif line.rstrip()[-1] in ":([{":
+                    indent += self.unit
+                self._insert("\n" + indent)
+                self.closers = 0
+            elif self.closers and self.buffer[self.cursor] == char:
+                self.cursor += 1  # Type over an auto-inserted closer
+                self.closers -= 1
+            elif char in AUTO_PAIRS and (
+                char not in "\"'" or not (before.isalnum() or before in "\"'")
+            ):
+                self._insert(char)
+                self.buffer.insert(self.cursor, AUTO_PAIRS[char])
+                self.closers += 1
+            else:
+                self._insert(char)
+
+    def press(self, key):
+        self._count()
+        if key == "delete":
+            del self.buffer[self.cursor]
+            self.closers = max(self.closers - 1, 0)
+            return
+        _, line = self._line()
+        width = len(self.unit)
+        count = 1
+        if line and not line.strip(" "):
+            count = len(line) - (len(line) - 1) // width * width  # Back to a tab stop
+        del self.buffer[self.cursor - count:self.cursor]
+        self.cursor -= count
+
+    def paste(self, text):
+        self._insert(text)
+
+
+def test_indentation_and_closers_the_editor_inserts_are_not_typed():
+    text = "if f(x):\n    y = [1]\nz\n"
+    auto, erase = EditorModel().process(text)
+    assert np.flatnonzero(auto).tolist() == [9, 10, 11, 12]  # Typing ")" and "]" types over
+    assert erase[text.index("z")] == 1  # One tab-stop backspace dedents
+
+
+def test_finish_removes_a_pending_closer():
+    model = EditorModel()
+    model.process("print(")
+    assert model.finish() == (-1, "")
+
+
+def test_typed_code_matches_the_source_in_the_editor():
+    editor = EditorBackend()
+    simulator = TypingSimulator(CONFIG, editor)
+    simulator.type_stream(SOURCE, seed=3)
+    assert editor.text == SOURCE
+    assert simulator.metrics.keys < 0.9 * len(SOURCE)
+
+
+def test_resumed_code_run_matches_the_source():
+    editor = EditorBackend()
+    simulator = TypingSimulator(CONFIG, editor)
+    for stop_at in (500, 1700, 3100):
+        editor.stop_after = (editor.keys + stop_at, simulator)
+        simulator.type_stream(SOURCE, seed=5, checkpoint=simulator.checkpoint)
+        assert simulator.checkpoint is not None
+    editor.stop_after = None
+    simulator.type_stream(SOURCE, checkpoint=simulator.checkpoint)
+    assert simulator.checkpoint is None
+    assert editor.text == SOURCE
+
+
+def test_editor_model_state_round_trips():
+    model = EditorModel()
+    model.process(SOURCE[:1000])
+    state = model.state()
+    expected = model.process(SOURCE[1000:])
+    model.restore(state)
+    np.testing.assert_array_equal(model.process(SOURCE[1000:]), expected)
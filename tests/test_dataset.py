@@ -0,0 +1,54 @@
+import numpy as np
+from src.backends import RecordingBackend
+from src.config import DEFAULT_CONFIG
+from src.dataset import document_seed, generate_dataset, iter_documents, plan_events
+from src.trace import TraceRecorder
+from src.typing_engine import TypingSimulator
+
+CONFIG = dict(DEFAULT_CONFIG, WPM_MEAN=400, ERROR_RATE=0.3)
+DOCUMENTS = [f"document {i}: the quick brown fox jumps over the lazy dog" for i in range(7)]
+
+
+def read_dataset(directory):
+    return dict(iter_documents(directory))
+
+
+def test_dataset_holds_every_document(tmp_path):
+    manifest = generate_dataset(DOCUMENTS, str(tmp_path), CONFIG, seed=5, workers=1, shard_size=3)
+    assert manifest["documents"] == len(DOCUMENTS)
+    assert len(manifest["shards"]) == 3
+    events = read_dataset(str(tmp_path))
+    assert sorted(events) == list(range(len(DOCUMENTS)))
+    assert manifest["events"] == sum(len(e) for e in events.values())
+    for index, document in enumerate(DOCUMENTS):
+        typed = []
+        for key in events[index]["key"]:
+            if key == "\b":
+                typed.pop()
+            else:
+                typed.append(key)
+        assert "".join(typed) == document
+
+
+def test_output_does_not_depend_on_workers_or_shard_size(tmp_path):
+    generate_dataset(DOCUMENTS, str(tmp_path / "a"), CONFIG, seed=5, workers=1, shard_size=7)
+    generate_dataset(DOCUMENTS, str(tmp_path / "b"), CONFIG, seed=5, workers=2, shard_size=2)
+    first = read_dataset(str(tmp_path / "a"))
+    second = read_dataset(str(tmp_path / "b"))
+    assert first.keys() == second.keys()
+    for index in first:
+        assert np.array_equal(first[index], second[index])
+
+
+def test_plan_events_match_a_live_run():
+    text = DOCUMENTS[0]
+    seed = document_seed(5, 0)
+    config = dict(CONFIG, PLAN_CACHE=False)
+    planned = plan_events(TypingSimulator(config).plan(text, seed))
+    trace = TraceRecorder()
+    TypingSimulator(config, RecordingBackend(), trace=trace).type_stream(text, seed=seed)
+    live = trace.records()
+    assert "\b" in "".join(live["key"])
+    assert "".join(planned["key"]) == "".join(live["key"])
+    assert np.array_equal(planned["error"], live["error"])
+    assert np.allclose(planned["planned"][1:], live["planned"][1:])
@@ -0,0 +1,23 @@
+import pathlib
+import numpy as np
+import pytest
+from src.config import DEFAULT_CONFIG
+from src.typing_engine import TypingSimulator
+
+SOURCE = (pathlib.Path(__file__).parent.parent / "src" / "planner.py").read_text() * 3
+
+
+@pytest.mark.parametrize("code_mode", [False, True])
+def test_estimated_errors_match_the_slips_planned(code_mode):
+    config = dict(DEFAULT_CONFIG, PLAN_CACHE=False, CODE_MODE=code_mode)
+    simulator = TypingSimulator(config)
+    estimate = simulator.estimate(SOURCE)
+    slips = np.mean([
+        np.count_nonzero(simulator.plan(SOURCE, seed)["wrong"] != "") for seed in range(3)
+    ])
+    assert estimate.errors == pytest.approx(slips, rel=0.08)
+
+
+def test_omissions_are_not_estimated_as_slips():
+    config = dict(DEFAULT_CONFIG, PLAN_CACHE=False, ERROR_TYPES=["omit"])
+    assert TypingSimulator(config).estimate(SOURCE).errors == 0
@@ -0,0 +1,16 @@
+from src.features import FEATURE_DTYPE, text_features
+from src.planner import PAUSE_RULES, text_to_keys
+
+
+def test_pause_rules_read_computed_features():
+    assert {feature for _, feature, _ in PAUSE_RULES} <= set(FEATURE_DTYPE.names)
+
+
+def test_features_describe_the_text_before_each_key():
+    text = "Hello, worlds. Ok"
+    features = text_features(text_to_keys(text))
+    assert features["comma"][text.index(",") + 1]
+    assert features["sentence_end"][text.index(".") + 1]
+    assert features["long_word"][text.index("s.") + 1]
+    assert not features["long_word"][text.index("Ok") + 1]
+    assert features["transition"][text.index(" w") + 1]
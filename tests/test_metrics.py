@@ -0,0 +1,17 @@
+from src.metrics import TypingMetrics
+from src.trace import TRACE_CLEAN, TRACE_CORRECTION, TRACE_ERROR
+
+
+def test_only_correction_backspaces_count_as_corrections():
+    metrics = TypingMetrics()
+    events = [
+        ("a", TRACE_CLEAN),
+        ("\b", TRACE_CLEAN),  # Code mode removing an auto-indent
+        ("\x7f", TRACE_CLEAN),  # ... or an auto-closed bracket
+        ("x", TRACE_ERROR),
+        ("\b", TRACE_CORRECTION),
+        ("b", TRACE_CORRECTION),
+    ]
+    for now, (key, error) in enumerate(events):
+        metrics.record_key(float(now), key, 0.0, error)
+    assert (metrics.keys, metrics.errors, metrics.corrections, metrics.edits) == (2, 1, 1, 2)
@@ -0,0 +1,31 @@
+import os
+import numpy as np
+from src.config import DEFAULT_CONFIG
+from src.plan_cache import DISK_MIN_KEYS, PlanCache, get_plan_cache
+from src.planner import PLAN_DTYPE
+
+
+def _plan(keys=DISK_MIN_KEYS):
+    return np.zeros(keys, dtype=PLAN_DTYPE)
+
+
+def test_disk_tier_is_off_by_default(tmp_path):
+    cache = get_plan_cache(dict(DEFAULT_CONFIG, PLAN_CACHE_DIR=str(tmp_path)))
+    assert cache.disk_bytes == 0
+    cache.put("a" * 40, _plan(), [None, None])
+    cache.flush()
+    assert os.listdir(tmp_path) == []
+
+
+def test_disk_tier_round_trips_and_evicts(tmp_path):
+    size = _plan().nbytes
+    cache = PlanCache(memory_bytes=0, disk_bytes=int(2.5 * size), directory=str(tmp_path))
+    for i in range(4):
+        cache.put(f"{i:040x}", _plan(), [i, None])
+    cache.flush()
+    files = os.listdir(tmp_path)
+    assert 1 <= len(files) <= 2
+    assert f"{3:040x}.plan" in files
+    plan, state = cache.get(f"{3:040x}")
+    assert state == [3, None]
+    assert plan.size == DISK_MIN_KEYS
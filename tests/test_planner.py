@@ -0,0 +1,30 @@
+import numpy as np
+import pytest
+from src.config import DEFAULT_CONFIG
+from src.typing_engine import TypingSimulator
+
+TEXT = (
+    "The quick brown fox jumps over the lazy dog. Pack my box with five dozen "
+    "liquor jugs, then wait. Sphinx of black quartz, judge my vow! "
+) * 20
+
+
+def _achieved_wpm(config):
+    simulator = TypingSimulator(dict(config, PLAN_CACHE=False))
+    plan = simulator.plan(TEXT, seed=1)
+    ms = (
+        plan["delay"].sum(dtype=np.float64) + plan["pause"].sum(dtype=np.float64)
+        + (plan["hesitation"] + plan["backspace"])[plan["correct"]].sum(dtype=np.float64)
+    )
+    return len(TEXT) / 5 / (ms / 60000)
+
+
+@pytest.mark.parametrize("wpm", [30, 100, 300, 1000])
+def test_plan_types_at_the_target_speed(wpm):
+    achieved = _achieved_wpm(dict(DEFAULT_CONFIG, WPM_MEAN=wpm))
+    assert achieved == pytest.approx(wpm, rel=0.02)
+
+
+def test_pauses_slow_the_plan_down_when_not_kept_to_target():
+    config = dict(DEFAULT_CONFIG, WPM_MEAN=300, KEEP_TARGET_WPM=False)
+    assert _achieved_wpm(config) < 0.9 * 300
@@ -0,0 +1,45 @@
+import pytest
+from src.sources import FileDocument, iter_file_chunks, iter_newlines
+
+
+def test_crlf_file_types_one_newline_per_line(tmp_path):
+    path = tmp_path / "crlf.txt"
+    path.write_bytes(b"one\r\ntwo\r\rthree\r\n" * 1000)
+    expected = "one\ntwo\n\nthree\n" * 1000
+    # Small chunks put "\r\n" across chunk boundaries
+    for chunk_size in (1, 2, 3, 7, 4096):
+        assert "".join(iter_file_chunks(path, chunk_size)) == expected
+
+
+def test_newlines_split_across_chunks():
+    assert "".join(iter_newlines(["a\r", "\nb\r", "\r", "c\r"])) == "a\nb\n\nc\n"
+
+
+def test_file_document_matches_stream(tmp_path):
+    path = tmp_path / "crlf.txt"
+    path.write_bytes("héllo\r\nwörld\r\n".encode() * 500)
+    document = FileDocument(path, page_size=10)
+    try:
+        text = "".join(document.chunks())
+        assert text == "héllo\nwörld\n" * 500
+        assert len(document) == len(text)
+        assert "".join(document.page(i) for i in range(document.pages)) == text
+    finally:
+        document.close()
+
+
+def test_file_document_closes_undecodable_files(tmp_path, monkeypatch):
+    path = tmp_path / "binary.bin"
+    path.write_bytes(b"ok\xff\xfe")
+    opened = []
+    real_open = open
+
+    def tracking_open(*args, **kwargs):
+        f = real_open(*args, **kwargs)
+        opened.append(f)
+        return f
+
+    monkeypatch.setattr("builtins.open", tracking_open)
+    with pytest.raises(UnicodeDecodeError):
+        FileDocument(str(path))
+    assert opened and all(f.closed for f in opened)
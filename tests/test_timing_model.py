@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+from src.timing_model import ROW_JUMP, SAME_FINGER, DigraphModel, main
+from src.trace import TRACE_DTYPE, TRACE_ERROR, TraceRecorder, load_trace
+
+
+def factor(model, first, second):
+    index = model.indices(np.array([first, second]))
+    return model.factors[index[0], index[1]]
+
+
+def test_prior_slows_same_finger_pairs():
+    model = DigraphModel.from_layout("qwerty")
+    assert np.isclose(factor(model, "e", "d"), SAME_FINGER + ROW_JUMP)
+    assert factor(model, "f", "j") < factor(model, "f", "d") < factor(model, "e", "d")
+    assert factor(model, "a", "A") > factor(model, "a", "a")  # Shifted second key
+    # Characters off the layout share the average slot
+    assert factor(model, "é", "x") == 1.0
+
+
+def test_sample_is_seeded_and_keeps_the_mean():
+    model = DigraphModel.from_layout("qwerty")
+    keys = np.array(list("the quick brown fox jumps over the lazy dog"))
+    first = model.sample(keys, np.random.default_rng(7))
+    second = model.sample(keys, np.random.default_rng(7))
+    assert first.shape == (len(keys) - 1,)
+    assert np.array_equal(first, second)
+    assert np.isclose(first.mean(), 1.0)
+    assert model.sample(keys, np.random.default_rng(7), start=0).shape == (len(keys),)
+
+
+def synthetic_trace(pairs, repeats, between=300):
+    """Trace typing each (first, second, gap_ms) pair ``repeats`` times.
+
+    ``between`` is the gap in ms before the first key of every pair.
+    """
+    trace = np.zeros(len(pairs) * repeats * 2, dtype=TRACE_DTYPE)
+    keys = [key for first, second, _ in pairs for key in (first, second)] * repeats
+    gaps = [gap for _, _, gap in pairs for gap in (between, gap)] * repeats
+    trace["key"] = keys
+    trace["actual"] = gaps
+    return trace
+
+
+def test_fit_moves_factors_towards_the_traces():
+    model = DigraphModel.from_layout("qwerty")
+    # Recorded typist is slow on "fj" and quick on "ed", against the prior
+    trace = synthetic_trace([("f", "j", 400), ("e", "d", 100)], 200)
+    fitted = model.fit([trace], prior_weight=5)
+    assert factor(fitted, "f", "j") > factor(model, "f", "j")
+    assert factor(fitted, "e", "d") < factor(model, "e", "d")
+    assert factor(fitted, "f", "j") > factor(fitted, "e", "d")
+    # Unobserved pairs keep the prior
+    assert factor(fitted, "q", "p") == factor(model, "q", "p")
+
+
+def test_fit_ignores_pauses_and_errors():
+    model = DigraphModel.from_layout("qwerty")
+    with pytest.raises(ValueError):
+        model.fit([synthetic_trace([("f", "j", 5000)], 50, between=5000)])
+    trace = synthetic_trace([("f", "j", 400)], 50)
+    trace["error"] = TRACE_ERROR
+    with pytest.raises(ValueError):
+        model.fit([trace])
+
+
+def test_cli_fits_and_saves_a_model(tmp_path):
+    path = str(tmp_path / "run.trace")
+    recorder = TraceRecorder(path=path)
+    for i, key in enumerate("asdf jkl; " * 30):
+        recorder.record(i * 0.15, key, 150.0)
+    recorder.close()
+    output = str(tmp_path / "model.npz")
+    assert main([path, "-o", output]) == 0
+    loaded = DigraphModel.load(output)
+    fitted = DigraphModel.from_layout("qwerty").fit([load_trace(path)])
+    assert np.array_equal(loaded.chars, fitted.chars)
+    assert np.allclose(loaded.factors, fitted.factors)
+    assert np.allclose(loaded.spreads, fitted.spreads)
+
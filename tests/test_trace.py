@@ -0,0 +1,53 @@
+import numpy as np
+from src.backends import RecordingBackend
+from src.config import DEFAULT_CONFIG
+from src.trace import TRACE_CLEAN, TRACE_CORRECTION, TraceRecorder, load_trace
+from src.typing_engine import TypingSimulator
+
+
+def test_ring_buffer_keeps_the_latest_records_in_order():
+    trace = TraceRecorder(capacity=4)
+    for i, key in enumerate("abcdef"):
+        trace.record(float(i), key, 10.0)
+    records = trace.records()
+    assert "".join(records["key"]) == "cdef"
+    assert list(records["time"]) == [2.0, 3.0, 4.0, 5.0]
+    assert trace.total == 6
+
+
+def test_actual_gaps_skip_suspended_time():
+    trace = TraceRecorder()
+    trace.mark(0.0)
+    trace.record(0.1, "a", 100.0)
+    trace.shift(5.0)
+    trace.record(5.3, "b", 200.0)
+    assert np.allclose(trace.records()["actual"], [100.0, 200.0])
+
+
+def test_flushed_trace_round_trips(tmp_path):
+    path = str(tmp_path / "run.trace")
+    trace = TraceRecorder(capacity=3, path=path)
+    for i, key in enumerate("hello"):
+        trace.record(float(i), key, 50.0, TRACE_CORRECTION if key == "o" else TRACE_CLEAN)
+    trace.close()
+    records = load_trace(path)
+    assert "".join(records["key"]) == "hello"
+    assert list(records["error"]) == [0, 0, 0, 0, TRACE_CORRECTION]
+
+
+def test_engine_traces_every_emitted_key():
+    text = "hello world, this is a trace"
+    trace = TraceRecorder()
+    config = dict(DEFAULT_CONFIG, PLAN_CACHE=False, WPM_MEAN=400, ERROR_RATE=0.5)
+    backend = RecordingBackend()
+    TypingSimulator(config, backend, trace=trace).type_stream(text, seed=3)
+    keys = "".join(trace.records()["key"])
+    assert "\b" in keys
+    # Replaying the trace, with "\b" erasing, gives the typed text
+    typed = []
+    for key in keys:
+        if key == "\b":
+            typed.pop()
+        else:
+            typed.append(key)
+    assert "".join(typed) == text == backend.text
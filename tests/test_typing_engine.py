@@ -0,0 +1,62 @@
+import threading
+import time
+from src.backends import RecordingBackend
+from src.config import DEFAULT_CONFIG
+from src.typing_engine import TypingSimulator
+
+
+def test_stop_during_start_delay_is_honoured():
+    simulator = TypingSimulator(dict(DEFAULT_CONFIG, PLAN_CACHE=False), RecordingBackend())
+    simulator.prepare()
+    simulator.stop()  # Before the run even started
+    start = time.perf_counter()
+    simulator.type_stream("hello world", seed=1, start_delay=5)
+    assert time.perf_counter() - start < 1
+    assert simulator.backend.events == []
+    assert simulator.checkpoint is not None
+
+
+def test_stop_cuts_the_start_delay_short():
+    simulator = TypingSimulator(dict(DEFAULT_CONFIG, PLAN_CACHE=False), RecordingBackend())
+    simulator.prepare()
+    threading.Timer(0.05, simulator.stop).start()
+    start = time.perf_counter()
+    simulator.type_stream("hello world", seed=1, start_delay=5)
+    assert time.perf_counter() - start < 1
+    assert simulator.backend.events == []
+
+
+class SlowBackend(RecordingBackend):
+    """Recording backend whose every write() takes ``cost`` seconds."""
+
+    def __init__(self, cost):
+        super().__init__()
+        self.cost = cost
+        self.call_cost = cost
+
+    def write(self, text):
+        time.sleep(self.cost)
+        super().write(text)
+
+
+BURST_CONFIG = dict(DEFAULT_CONFIG, PLAN_CACHE=False, WPM_MEAN=400, WPM_STD=0, ENABLE_ERRORS=False)
+
+
+def test_burst_mode_merges_keys_faster_than_a_backend_call():
+    text = "the quick brown fox jumps over the lazy dog"
+    backend = SlowBackend(0.02)
+    TypingSimulator(BURST_CONFIG, backend).type_stream(text, seed=1)
+    writes = [value for _, action, value in backend.events if action == "write"]
+    assert len(writes) < len(text)
+    assert any(len(value) > 1 for value in writes)
+    assert backend.text == text
+
+
+def test_burst_mode_off_writes_one_key_per_call():
+    text = "the quick brown fox"
+    backend = SlowBackend(0.02)
+    config = dict(BURST_CONFIG, BURST_MODE=False)
+    TypingSimulator(config, backend).type_stream(text, seed=1)
+    writes = [value for _, action, value in backend.events if action == "write"]
+    assert all(len(value) == 1 for value in writes)
+    assert backend.text == text